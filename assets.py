@@ -0,0 +1,76 @@
+import pygame
+from course import screen_width, screen_height, land_thickness
+
+# the assets the game loops draw with (game.py plays the flap sound, human-vs-ai.py draws the blue player too)
+game_assets = ("background", "player", "land", "pipe", "font")
+
+_assets = {}
+_rotated_images = {}
+
+
+def loadBackground():
+    background = pygame.image.load("extras/background.png").convert()
+    return pygame.transform.scale(background, (screen_width, screen_height))
+
+
+def loadLand():
+    # land at the top of the screen is upside down
+    land_image = pygame.image.load("extras/base.png").convert()
+    land_image = pygame.transform.scale(land_image, (screen_width * 2, land_thickness))
+    return {"top": pygame.transform.flip(land_image, False, True),
+            "bottom": land_image}
+
+
+def loadPipes():
+    # pipes at the top of the screen are upside down
+    pipe_image = pygame.image.load("extras/pipe.png").convert()
+    return {"top": pygame.transform.flip(pipe_image, False, True),
+            "bottom": pipe_image}
+
+
+def loadFont(size):
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.Font("extras/roboto-bold.ttf", size)
+
+
+def loadFlapSound():
+    # sounds can only be loaded when the mixer is running
+    return pygame.mixer.Sound("extras/flapsound.wav") if pygame.mixer.get_init() else None
+
+
+_loaders = {
+    "background": loadBackground,
+    "player": lambda: [pygame.image.load(f"extras/bird{frame}.png").convert() for frame in (1, 2, 3)],
+    "blue player": lambda: [pygame.image.load(f"extras/bluebird{frame}.png").convert_alpha() for frame in (1, 2, 3)],
+    "land": loadLand,
+    "pipe": loadPipes,
+    "font": lambda: loadFont(25),
+    "small font": lambda: loadFont(14),
+    "flap sound": loadFlapSound,
+}
+
+
+def loadAssets(names=None):
+    # images are loaded, converted, scaled and flipped once per process and shared by every
+    # generation and sprite (the display mode has to be set before the first call).
+    # Only the assets in names are loaded (every asset if None), others are loaded by later calls
+    for name in _loaders if names is None else names:
+        if name not in _assets:
+            _assets[name] = _loaders[name]()
+    return _assets
+
+
+def getRotatedImages(player_images):
+    # every animation frame rotated to both angles a bird is drawn at, keyed by (frame, angle),
+    # with the offset of the rotated image from the bird's rect so drawing is a lookup and a blit
+    key = id(player_images)
+    if key not in _rotated_images:
+        rotated_images = {}
+        for frame, image in enumerate(player_images):
+            for angle in (25, -25):
+                rotated_image = pygame.transform.rotate(image, angle)
+                offset = rotated_image.get_rect(center=image.get_rect().center).topleft
+                rotated_images[frame, angle] = rotated_image, offset
+        _rotated_images[key] = rotated_images
+    return _rotated_images[key]
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import importlib.util
+import numpy as np
+import pygame
+import neat
+import simulation
+from course import screen_width, screen_height, loadSettings
+
+# train-ai.py can not be imported by name
+spec = importlib.util.spec_from_file_location("train_ai", os.path.join(os.path.dirname(__file__) or ".", "train-ai.py"))
+train_ai = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(train_ai)
+
+
+def createGenomes(config, size, seed):
+    # a new random population (generation 0) of the given size
+    config.pop_size = size
+    random.seed(seed)
+    return list(neat.Population(config).population.items())
+
+
+def trainChampion(config, size, seed, max_generations=100):
+    # the first generation of a population trained headless from seed (on course seed + k in generation k)
+    # in which a bird passes simulation.max_score, and its course. Most birds of it die at the first pipes
+    # while one plays until the generation is force quit. None if no generation got there
+    config.pop_size = size
+    random.seed(seed)
+    population = neat.Population(config)
+    champion = []
+
+    def evaluate(genomes, config):
+        course_seed = seed + population.generation
+        simulation.evaluateGenomes(genomes, config, train_ai.settings, course_seed)
+        if max(genome.pipes_passed for _, genome in genomes) > simulation.max_score:
+            champion.append((genomes, course_seed))
+
+    for _ in range(max_generations):
+        population.run(evaluate, 1)
+        if champion:
+            return champion[0]
+    return None
+
+
+def setPipeSpacing(value):
+    # horizontal_distance_between_pipes of game-config.cfg (screen width / value)
+    train_ai.settings["horizontal_distance_between_pipes"] = value
+
+
+def runGeneration(genomes, config, rendering, seed):
+    # wall time and number of frames of one generation of train-ai.py's game loop
+    start = time.perf_counter()
+    if rendering:
+        train_ai.HEADLESS = False
+        train_ai.seed = seed
+        train_ai.generation = 0
+        train_ai.gameloop(genomes, config)
+        frames = train_ai.game.frame_count
+    else:
+        frames = simulation.simulateGenomes(genomes, config, train_ai.settings, seed).frame_count
+    return frames, time.perf_counter() - start
+
+
+def runBenchmark(config, size, rendering, pipe_spacing, generations, seed):
+    setPipeSpacing(pipe_spacing)
+    results = []
+    for index in range(generations):
+        genomes = createGenomes(config, size, seed + index)
+        frames, seconds = runGeneration(genomes, config, rendering, seed + index)
+        results.append({"seed": seed + index, "frames": frames, "seconds": seconds})
+
+    frames = sum(result["frames"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    return {"case": "new population",
+            "population": size,
+            "rendering": rendering,
+            "pipe_spacing": pipe_spacing,
+            "frames_per_second": frames / seconds,
+            "generation_seconds": seconds / generations,
+            "generations": results}
+
+
+def runChampionBenchmark(genomes, config, rendering, course_seed):
+    frames, seconds = runGeneration(genomes, config, rendering, course_seed)
+    return {"case": "champion",
+            "population": len(genomes),
+            "rendering": rendering,
+            "pipe_spacing": train_ai.settings["horizontal_distance_between_pipes"],
+            "frames_per_second": frames / seconds,
+            "generation_seconds": seconds,
+            "generations": [{"seed": course_seed, "frames": frames, "seconds": seconds}]}
+
+
+def getMachine():
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "video_driver": pygame.display.get_driver() if pygame.display.get_init() else None}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure frames per second and generation time of train-ai.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000],
+                        help="population sizes to measure")
+    parser.add_argument("--rendering", choices=["on", "off", "both"], default="both",
+                        help="measure the sprite game loop (on), the headless simulation (off) or both")
+    parser.add_argument("--pipe-spacings", type=float, nargs="+", default=[3, 4.5, 6],
+                        help="values of horizontal_distance_between_pipes to measure")
+    parser.add_argument("--generations", type=int, default=3,
+                        help="generations (each a new random population and course) per measurement")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first population and course")
+    parser.add_argument("--champion", type=int, metavar="SIZE",
+                        help="also measure a generation of SIZE genomes in which a bird passes the max score "
+                             "(trained headless from --seed first, with the pipe spacing of game-config.cfg)")
+    parser.add_argument("--render-every", type=int, default=1,
+                        help="draw every k-th frame of rendered generations (as train-ai.py --render-every)")
+    parser.add_argument("--output", default="benchmark-results.json", help="file the results are written to as JSON")
+    args = parser.parse_args()
+    if args.render_every < 1:
+        parser.error("--render-every must be at least 1")
+
+    local_dir = os.path.dirname(__file__)
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                                os.path.join(local_dir, "neat-config.cfg"))
+
+    train_ai.settings = loadSettings()
+    renderings = {"on": [True], "off": [False], "both": [False, True]}[args.rendering]
+    if True in renderings:
+        # the window is opened here so train-ai.py reuses it without setting up the mixer and music,
+        # set SDL_VIDEODRIVER=dummy to draw without a display
+        pygame.display.init()
+        pygame.display.set_mode((screen_width, screen_height))
+        train_ai.frame_cap = False
+        train_ai.render_every = args.render_every
+
+    base_settings = dict(train_ai.settings)
+    results = []
+    for rendering in renderings:
+        for pipe_spacing in args.pipe_spacings:
+            for size in args.sizes:
+                result = runBenchmark(config, size, rendering, pipe_spacing, args.generations, args.seed)
+                results.append(result)
+                print(f"population {size:6d}  rendering {'on ' if rendering else 'off'}  pipe spacing {pipe_spacing:4g}  "
+                      f"{result['frames_per_second']:10.1f} frames/s  {result['generation_seconds']:8.3f} s/generation",
+                      file=sys.stderr)
+
+    if args.champion is not None:
+        train_ai.settings = dict(base_settings)
+        champion = trainChampion(config, args.champion, args.seed)
+        if champion is None:
+            parser.error(f"no bird of a population of {args.champion} passed the max score, try another --seed")
+        genomes, course_seed = champion
+        for rendering in renderings:
+            result = runChampionBenchmark(genomes, config, rendering, course_seed)
+            results.append(result)
+            print(f"champion   {args.champion:6d}  rendering {'on ' if rendering else 'off'}  "
+                  f"{result['frames_per_second']:10.1f} frames/s  {result['generation_seconds']:8.3f} s/generation",
+                  file=sys.stderr)
+
+    with open(args.output, "w") as file:
+        json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "machine": getMachine(),
+                   "settings": base_settings,
+                   "results": results}, file, indent=2)
+    print(f"results written to {args.output}", file=sys.stderr)
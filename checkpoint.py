@@ -0,0 +1,154 @@
+import os
+import re
+import gzip
+import time
+import pickle
+import random
+import itertools
+import threading
+import neat
+
+
+def writeAtomically(path, data):
+    # the checkpoint is written next to its final path and renamed over it once it is complete,
+    # so a process killed while writing never leaves a broken checkpoint behind
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(gzip.compress(data, compresslevel=5))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+class Checkpointer(neat.reporting.BaseReporter):
+    # keeps a snapshot of the population, species, best genome, random state and statistics at the end of
+    # every generation and writes it every generation_interval generations or time_interval seconds.
+    # Snapshots are pickled between generations and compressed and written by a background thread
+
+    def __init__(self, generation_interval=10, time_interval=900, directory="checkpoints",
+                 statistics=None, metadata=None):
+        self.generation_interval = generation_interval
+        self.time_interval = time_interval
+        self.directory = directory
+        self.statistics = statistics  # metrics.MetricsReporter whose summaries are saved with the population
+        self.metadata = metadata      # anything else needed to resume the run, e.g. the course seed
+
+        self.current_generation = None
+        self.best_genome = None
+        self.snapshot = None          # (generation, pickled state) at the end of the last generation
+        self.saved_generation = None
+        self.last_save_time = time.time()
+        self.writer = None            # thread writing the last checkpoint
+
+    def start_generation(self, generation):
+        self.current_generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        # same as neat.Population.best_genome, which reporters have no access to
+        if self.best_genome is None or best_genome.fitness > self.best_genome.fitness:
+            self.best_genome = best_genome
+
+    def end_generation(self, config, population, species_set):
+        # the population has already been reproduced, it is the one of the next generation
+        generation = self.current_generation + 1
+        state = {"generation": generation,
+                 "population": population,
+                 "species": species_set,
+                 "best genome": self.best_genome,
+                 "random state": random.getstate(),
+                 "statistics": None,
+                 "metadata": self.metadata}
+        if self.statistics is not None:
+            state["statistics"] = self.statistics.getState()
+
+        # the species set keeps the reporters (this one included), they are added again on restore
+        reporters = species_set.reporters
+        species_set.reporters = None
+        try:
+            self.snapshot = generation, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            species_set.reporters = reporters
+
+        due = self.saved_generation is None or generation - self.saved_generation >= self.generation_interval
+        if due or time.time() - self.last_save_time >= self.time_interval:
+            self.save()
+
+    def save(self, wait=False):
+        # writes the last snapshot (if it is not written already), wait blocks until it is on disk
+        if self.snapshot is not None and self.snapshot[0] != self.saved_generation:
+            generation, data = self.snapshot
+            self.wait()
+            path = os.path.join(self.directory, f"checkpoint-{generation}.pickle.gz")
+            self.writer = threading.Thread(target=writeAtomically, args=(path, data))
+            self.writer.start()
+            self.saved_generation = generation
+            self.last_save_time = time.time()
+        if wait:
+            self.wait()
+
+    def wait(self):
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+    def restore(self, path, config):
+        # returns a neat.Population that continues the checkpointed run and the run's metadata
+        with gzip.open(path, "rb") as file:
+            state = pickle.load(file)
+
+        random.setstate(state["random state"])
+        population = neat.Population(config, (state["population"], state["species"], state["generation"]))
+        population.species.reporters = population.reporters
+        population.best_genome = self.best_genome = state["best genome"]
+        self.saved_generation = state["generation"]
+
+        # new genomes continue the keys of the checkpointed run (the newest genome is in the population)
+        population.reproduction.genome_indexer = itertools.count(max(state["population"]) + 1)
+
+        if self.statistics is not None and state["statistics"] is not None:
+            self.statistics.setState(state["statistics"])
+
+        return population, state["metadata"]
+
+
+def createRunDirectory(directory="checkpoints"):
+    # every training run writes its checkpoints to a directory of its own in directory, named by its start
+    # time, so runs never overwrite each other's checkpoints
+    name = time.strftime("run-%Y%m%d-%H%M%S")
+    for index in itertools.count():
+        path = os.path.join(directory, name if index == 0 else f"{name}-{index}")
+        try:
+            os.makedirs(path)
+            return path
+        except FileExistsError:
+            pass
+
+
+def runCheckpoints(directory):
+    # paths of the checkpoints of a run directory by generation
+    checkpoints = {}
+    for filename in os.listdir(directory) if os.path.isdir(directory) else []:
+        match = re.fullmatch(r"checkpoint-(\d+)\.pickle\.gz", filename)
+        if match:
+            checkpoints[int(match.group(1))] = os.path.join(directory, filename)
+    return checkpoints
+
+
+def latestCheckpoint(directory="checkpoints"):
+    # path of the checkpoint of the latest generation of the run that saved a checkpoint last
+    # (None if there is none). Runs are the subdirectories of directory, and directory itself for
+    # checkpoints saved before runs had directories of their own
+    runs = [directory]
+    if os.path.isdir(directory):
+        runs += [path for path in (os.path.join(directory, name) for name in os.listdir(directory))
+                 if os.path.isdir(path)]
+
+    latest = None
+    for run in runs:
+        checkpoints = runCheckpoints(run)
+        if checkpoints:
+            path = checkpoints[max(checkpoints)]
+            if latest is None or os.path.getmtime(path) > os.path.getmtime(latest):
+                latest = path
+    return latest
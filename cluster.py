@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import itertools
+import threading
+import multiprocessing
+from multiprocessing.connection import Listener, Client, AuthenticationError
+import parallel
+
+# environment variable the shared key of the coordinator and its workers is read from
+authkey_variable = "FLAPPY_BIRD_AUTHKEY"
+
+
+def parseAddress(address):
+    # "host:port" is a TCP address, anything else the path of a Unix socket
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit():
+        return host or "0.0.0.0", int(port)
+    return address
+
+
+def getAuthkey(authkey=None):
+    # connections are authenticated with a shared key (tasks and results are pickled,
+    # so only processes that know the key may connect)
+    authkey = authkey or os.environ.get(authkey_variable)
+    if not authkey:
+        raise ValueError(f"a shared key is needed, pass --authkey or set {authkey_variable}")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class ClusterEvaluator:
+    # evaluates each generation's genomes on workers that connect over TCP or a Unix socket (see runWorker).
+    # Genomes are split into chunks of chunk_size that idle workers take one at a time, so faster workers
+    # take more of them. A chunk is handed to another worker when its worker dies, or also when it takes
+    # longer than task_timeout seconds (the first result is kept). Fitness is identical to
+    # simulation.evaluateGenomes on the whole population
+
+    def __init__(self, address, authkey, settings, chunk_size=50, task_timeout=120, local_workers=0):
+        self.settings = settings
+        self.chunk_size = chunk_size
+        self.task_timeout = task_timeout
+        self.authkey = getAuthkey(authkey)
+
+        self.tasks = queue.Queue()        # (task id, task) waiting for a worker
+        self.pending = {}                 # tasks without a result yet by id
+        self.results = {}
+        self.condition = threading.Condition()
+        self.task_ids = itertools.count()
+        self.connections = []
+        self.closed = False
+
+        self.listener = Listener(parseAddress(address), authkey=self.authkey)
+
+        # workers on this machine, e.g. to test the cluster on one box. They are forked before any thread
+        # of the evaluator starts (a forked child only gets the thread that forked it, with whatever locks
+        # the others held), they connect once the listener accepts
+        self.local_workers = [multiprocessing.Process(target=runWorker, args=(self.listener.address, self.authkey),
+                                                      daemon=True) for _ in range(local_workers)]
+        for worker in self.local_workers:
+            worker.start()
+
+        threading.Thread(target=self.acceptWorkers, daemon=True).start()
+
+    def acceptWorkers(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except AuthenticationError:
+                print("a worker failed to authenticate", file=sys.stderr)
+                continue
+            except OSError:
+                return  # the listener was closed
+            self.connections.append(connection)
+            threading.Thread(target=self.serveWorker, args=(connection,), daemon=True).start()
+
+    def serveWorker(self, connection):
+        # sends tasks to one worker until it dies or the evaluator is closed
+        while True:
+            task_id, task = self.tasks.get()
+            if task_id is None:
+                return
+            with self.condition:
+                if task_id not in self.pending:
+                    continue  # another worker returned it already
+
+            try:
+                connection.send((task_id, task))
+                requeued = False
+                while not connection.poll(self.task_timeout):
+                    if not requeued:
+                        # slow worker, the first worker to return the task wins
+                        self.requeue(task_id, task)
+                        requeued = True
+                result_id, result = connection.recv()
+            except (EOFError, OSError):
+                if not self.closed:
+                    print("lost a worker, its task is handed to another one", file=sys.stderr)
+                    self.requeue(task_id, task)
+                connection.close()
+                return
+
+            with self.condition:
+                if result_id in self.pending:
+                    del self.pending[result_id]
+                    self.results[result_id] = result
+                    self.condition.notify_all()
+
+    def requeue(self, task_id, task):
+        with self.condition:
+            if task_id in self.pending:
+                self.tasks.put((task_id, task))
+
+    def run(self, tasks):
+        task_ids = []
+        with self.condition:
+            for task in tasks:
+                task_id = next(self.task_ids)
+                self.pending[task_id] = task
+                self.tasks.put((task_id, task))
+                task_ids.append(task_id)
+            while any(task_id in self.pending for task_id in task_ids):
+                self.condition.wait()
+            return [self.results.pop(task_id) for task_id in task_ids]
+
+    def evaluate(self, genomes, config, seed, record=False, combine="mean"):
+        number_of_chunks = -(-len(genomes) // self.chunk_size)
+        return parallel.evaluateChunks(genomes, config, self.settings, seed, number_of_chunks, self.run,
+                                       record, combine)
+
+    def close(self):
+        # workers exit once their connection is closed
+        self.closed = True
+        self.listener.close()
+        for _ in self.connections:
+            self.tasks.put((None, None))
+        for connection in self.connections:
+            connection.close()
+        for worker in self.local_workers:
+            worker.join()
+
+
+def runWorker(address, authkey, retry_seconds=1.0):
+    # evaluates the chunks a coordinator sends until it closes the connection
+    # (waiting for the coordinator to start listening if it has not yet)
+    while True:
+        try:
+            connection = Client(address, authkey=getAuthkey(authkey))
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            time.sleep(retry_seconds)
+
+    with connection:
+        while True:
+            try:
+                task_id, task = connection.recv()
+                result = parallel.evaluateChunk(*task)
+                connection.send((task_id, result))
+            except (EOFError, OSError):
+                return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate genomes for train-ai.py --cluster on this machine")
+    parser.add_argument("address", help="address train-ai.py listens on, host:port or the path of a Unix socket")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="number of worker processes to run (one per CPU if not given)")
+    parser.add_argument("--authkey", help=f"key shared with train-ai.py (read from {authkey_variable} if not given)")
+    args = parser.parse_args()
+
+    address = parseAddress(args.address)
+    authkey = getAuthkey(args.authkey)
+    workers = [multiprocessing.Process(target=runWorker, args=(address, authkey)) for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
@@ -0,0 +1,53 @@
+import itertools
+import numpy as np
+from course import screen_height, land_thickness, land_width
+
+# sprites are shrunk by this ratio before testing for collisions
+collision_ratio = 0.95
+
+
+def shrinkRect(x, y, width, height):
+    # same rect that pygame.sprite.collide_rect_ratio(collision_ratio) tests (Rect.inflate truncates)
+    dx = int(width * collision_ratio - width)
+    dy = int(height * collision_ratio - height)
+    return x - int(dx / 2), y - int(dy / 2), width + dx, height + dy
+
+
+def getHitboxes(course, pipe, frame, right, index=None):
+    # shrunk rects of the land and of the pipe pairs from pipe on whose column starts left of right,
+    # the only obstacles a bird with that right edge can overlap (usually the land and a single pipe pair).
+    # On course.Courses the tops of the pipe rects are arrays over the birds in index
+    x, y, width, height = shrinkRect(course.landX(frame), 0, land_width, land_thickness)
+    hitboxes = [(x, y, width, height), (x, y + screen_height - land_thickness, width, height)]
+
+    for pair in range(pipe, course.pipeCount(frame)):
+        if course.pipeX(pair, frame) >= right:
+            break
+        for rect in course.pipeRects(pair, frame, index):
+            hitboxes.append(shrinkRect(*rect))
+    return hitboxes
+
+
+def getSpriteHitboxes(player_rect, land_rects, pipe_rects):
+    # same as getHitboxes for the sprite rects of the land and of the pipes not yet passed (in order)
+    pipe_rects = itertools.takewhile(lambda rect: rect.left < player_rect.right, pipe_rects)
+    return [shrinkRect(*rect) for rect in itertools.chain(land_rects, pipe_rects)]
+
+
+def collideHitbox(hitbox, hitboxes):
+    # whether the shrunk rect of a bird overlaps any of the hitboxes (Rect.colliderect)
+    x, y, width, height = hitbox
+    for rect_x, rect_y, rect_width, rect_height in hitboxes:
+        if x < rect_x + rect_width and x + width > rect_x and y < rect_y + rect_height and y + height > rect_y:
+            return True
+    return False
+
+
+def collideHitboxes(x, width, tops, height, hitboxes):
+    # collideHitbox for birds that share a column, tops is an array of the tops of their shrunk rects
+    # (and the tops of the hitboxes can be arrays of the same length)
+    collided = np.zeros(len(tops), dtype=bool)
+    for rect_x, rect_y, rect_width, rect_height in hitboxes:
+        if x < rect_x + rect_width and x + width > rect_x:
+            collided |= (tops < rect_y + rect_height) & (tops + height > rect_y)
+    return collided
@@ -0,0 +1,89 @@
+import os
+import sys
+import random
+import argparse
+import importlib.util
+import neat
+import simulation
+from course import loadSettings
+
+# the sprite loop draws on the surface of the SDL dummy video driver
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# train-ai.py can not be imported by name
+spec = importlib.util.spec_from_file_location("train_ai", os.path.join(os.path.dirname(__file__) or ".", "train-ai.py"))
+train_ai = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(train_ai)
+
+# the three implementations of a generation:
+#   sprites - train-ai.py's game loop with engine.Game and engine.Player
+#   arrays  - simulation.simulateFrame on every frame
+#   birds   - simulation.simulateBirds on every frame after the first
+paths = ("sprites", "arrays", "birds")
+
+
+def getResults(genomes):
+    return [(genome.fitness, genome.frames_alive, genome.pipes_passed) for _, genome in genomes]
+
+
+def playGeneration(genomes, config, course_seed, path):
+    # the fitness, frames alive and pipes passed of every genome played on the course by one implementation
+    if path == "sprites":
+        train_ai.playGeneration(genomes, config, course_seed, draw_every=sys.maxsize)
+        return getResults(genomes)
+
+    scalar_birds = simulation.scalar_birds
+    simulation.scalar_birds = 0 if path == "arrays" else len(genomes)
+    try:
+        simulation.evaluateGenomes(genomes, config, train_ai.settings, course_seed)
+    finally:
+        simulation.scalar_birds = scalar_birds
+    return getResults(genomes)
+
+
+def checkGenerations(config, generations, seed):
+    # trains from seed (generation k on course seed + k) and plays every generation with every implementation,
+    # returns the generations whose results differ
+    random.seed(seed)
+    population = neat.Population(config)
+    mismatched = []
+
+    def evaluate(genomes, config):
+        course_seed = seed + population.generation
+        results = {path: playGeneration(genomes, config, course_seed, path) for path in paths}
+        equal = all(results[path] == results[paths[0]] for path in paths)
+        if not equal:
+            mismatched.append(population.generation)
+        best = max(pipes for _, _, pipes in results[paths[0]])
+        print(f"generation {population.generation:3d}  {len(genomes)} genomes  best {best:5d} pipes  "
+              f"{'equal' if equal else 'DIFFERENT'}", file=sys.stderr)
+
+    population.run(evaluate, generations)
+    return mismatched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that the sprite game loop, the array simulation and the "
+                                                 "bird by bird simulation give every genome the same results")
+    parser.add_argument("--generations", type=int, default=10, help="generations to train and check")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the population and of the first course")
+    parser.add_argument("--population", type=int, help="population size (pop_size of neat-config.cfg if not given)")
+    args = parser.parse_args()
+
+    local_dir = os.path.dirname(__file__)
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                                os.path.join(local_dir, "neat-config.cfg"))
+    if args.population is not None:
+        config.pop_size = args.population
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    train_ai.settings = loadSettings()
+    train_ai.fast_startup = True
+    train_ai.frame_cap = False
+
+    mismatched = checkGenerations(config, args.generations, args.seed)
+    if mismatched:
+        print(f"generations {mismatched} give different results", file=sys.stderr)
+        sys.exit(1)
+    print("every implementation gives the same fitness, frames alive and pipes passed", file=sys.stderr)
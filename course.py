@@ -0,0 +1,156 @@
+import random
+import functools
+import configparser
+import numpy as np
+
+screen_width = 800
+screen_height = 600
+land_thickness = 80
+
+# sizes of the pipe image and of the land image (scaled to twice the screen width)
+pipe_width, pipe_height = 52, 320
+land_width = screen_width * 2
+
+# pipes generated up front, enough for a bird to reach simulation.max_score
+course_length = 1536
+
+
+def loadSettings(path="game-config.cfg", **overrides):
+    configParser = configparser.RawConfigParser()
+    configParser.read(path)
+
+    settings = {"FPS": configParser.getint("game settings", "FPS")}
+    for key in ("g", "player_speed", "horizontal_speed", "distance_between_pipes",
+                "horizontal_distance_between_pipes", "min_pipe_height"):
+        settings[key] = configParser.getfloat("game settings", key)
+
+    settings.update(overrides)
+    return settings
+
+
+def roundCoordinate(value):
+    # pygame rounds float coordinates half away from zero when a rect position is assigned
+    return int(value + 0.5) if value >= 0 else int(value - 0.5)
+
+
+class Course:
+    # pipe gaps of a whole course generated ahead of time from a seed. Obstacles scroll by a whole
+    # number of pixels every frame, so when each pipe appears and where it is follows from the frame number
+
+    def __init__(self, settings, seed=None, length=course_length):
+        self.random = random.Random(seed)
+        self.speed = int(settings["horizontal_speed"])  # rects move by whole pixels
+        if self.speed <= 0:
+            raise ValueError("horizontal_speed must be at least 1 pixel per frame")
+
+        self.distance_between_pipes = settings["distance_between_pipes"]
+        self.lowest_gap = int(land_thickness + settings["min_pipe_height"])
+        self.highest_gap = int(screen_height - land_thickness - settings["min_pipe_height"] -
+                               settings["distance_between_pipes"])
+
+        # a new pipe is created once the last one is further than horizontal_distance_between_pipes from the edge
+        horizontal_distance_between_pipes = screen_width / settings["horizontal_distance_between_pipes"]
+        self.pipe_interval = 1
+        while self.speed * self.pipe_interval - pipe_width <= horizontal_distance_between_pipes:
+            self.pipe_interval += 1
+
+        # the land is moved back once its right edge reaches the edge of the screen
+        self.land_interval = -(-(land_width - screen_width) // self.speed)
+
+        # top coordinate of the gap of every pipe pair
+        self.gaps = np.empty(0, dtype=np.int16)
+        self.extend(length)
+
+    def extend(self, length):
+        # draws more pipes from the same sequence, the course is the same however far it was generated
+        new_gaps = [self.random.randint(self.lowest_gap, self.highest_gap) for _ in range(length - len(self.gaps))]
+        self.gaps = np.concatenate((self.gaps, np.array(new_gaps, dtype=np.int16)))
+
+    def gap(self, pipe):
+        if pipe >= len(self.gaps):
+            self.extend(2 * pipe + 1)
+        return int(self.gaps[pipe])
+
+    def pipeCount(self, frame):
+        # pipe pairs created up to frame (the first one exists before the first frame)
+        return frame // self.pipe_interval + 1
+
+    def pipeX(self, pipe, frame):
+        return screen_width - self.speed * (frame - pipe * self.pipe_interval)
+
+    def landX(self, frame):
+        return -self.speed * (frame % self.land_interval)
+
+    def passedPipes(self, frame, x):
+        # pipe pairs whose right edge is left of x, the first one that is not is the next pipe
+        frames_to_pass = (screen_width + pipe_width - x) // self.speed + 1
+        return max(0, (frame - frames_to_pass) // self.pipe_interval + 1)
+
+    def passingFrame(self, pipes, x):
+        # first frame passedPipes(frame, x) reaches pipes in
+        frames_to_pass = (screen_width + pipe_width - x) // self.speed + 1
+        return frames_to_pass + (pipes - 1) * self.pipe_interval
+
+    def pipeRects(self, pipe, frame, index=None):
+        # rects of the top and bottom pipe of a pipe pair (index is for Courses)
+        x = self.pipeX(pipe, frame)
+        top_coordinate = self.gap(pipe)
+        bottom_coordinate = roundCoordinate(top_coordinate + self.distance_between_pipes)
+        return (x, top_coordinate - pipe_height, pipe_width, pipe_height), \
+               (x, bottom_coordinate, pipe_width, pipe_height)
+
+
+class Courses:
+    # several courses with the same settings played at once, bird b plays courses[course_index[b]].
+    # Pipes appear in the same frames on every course, only the gaps differ, so pipeRects gives the
+    # top coordinates of the pipes as arrays over the birds in index
+
+    def __init__(self, courses, course_index):
+        self.courses = courses
+        self.course_index = course_index
+        self.distance_between_pipes = courses[0].distance_between_pipes
+        self.gaps = np.stack([course.gaps for course in courses]).astype(np.int64)
+
+    def gap(self, pipe):
+        # top coordinate of the gap of a pipe pair on every course
+        if pipe >= self.gaps.shape[1]:
+            for course in self.courses:
+                course.gap(pipe)
+            length = min(len(course.gaps) for course in self.courses)
+            self.gaps = np.stack([course.gaps[:length] for course in self.courses]).astype(np.int64)
+        return self.gaps[:, pipe]
+
+    def pipeCount(self, frame):
+        return self.courses[0].pipeCount(frame)
+
+    def pipeX(self, pipe, frame):
+        return self.courses[0].pipeX(pipe, frame)
+
+    def landX(self, frame):
+        return self.courses[0].landX(frame)
+
+    def passedPipes(self, frame, x):
+        return self.courses[0].passedPipes(frame, x)
+
+    def passingFrame(self, pipes, x):
+        return self.courses[0].passingFrame(pipes, x)
+
+    def pipeRects(self, pipe, frame, index):
+        x = self.pipeX(pipe, frame)
+        top_coordinate = self.gap(pipe)[self.course_index[index]]
+        # roundCoordinate of every gap (gaps are positive)
+        bottom_coordinate = np.floor(top_coordinate + self.distance_between_pipes + 0.5).astype(np.int64)
+        return (x, top_coordinate - pipe_height, pipe_width, pipe_height), \
+               (x, bottom_coordinate, pipe_width, pipe_height)
+
+
+@functools.lru_cache(maxsize=64)
+def _cachedCourse(seed, settings):
+    return Course(dict(settings), seed)
+
+
+def getCourse(settings, seed):
+    # courses are shared by every evaluation with the same seed and settings
+    if seed is None:
+        return Course(settings)
+    return _cachedCourse(seed, tuple(sorted(settings.items())))
@@ -0,0 +1,307 @@
+import os
+import collections
+import pygame
+import assets
+import collision
+from hud import Hud
+from course import screen_width, screen_height, land_thickness, pipe_width, getCourse
+
+_clock = None
+
+
+def getClock():
+    # the clock capping the game loops at FPS, created on first use
+    global _clock
+    if _clock is None:
+        _clock = pygame.time.Clock()
+    return _clock
+
+
+def initializeAudio():
+    pygame.mixer.pre_init(44100, -16, 2, 2048)
+    pygame.mixer.init()
+    pygame.mixer.music.load("extras/backgroundmusic.mp3")
+    pygame.mixer.music.play(loops=-1)
+
+
+def initializeGame(fast=False):
+    # the window (and the mixer and music) are set up once per process and reused by every round,
+    # nothing is set up until a front-end draws (a window opened elsewhere, e.g. by benchmark.py, is reused).
+    # The fast startup of batch jobs draws on a surface of the SDL dummy video driver and never
+    # touches the mixer, the caption or the icon
+    screen = pygame.display.get_surface()
+    if screen is not None:
+        return screen
+
+    if fast:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        pygame.display.init()
+        return pygame.display.set_mode((screen_width, screen_height))
+
+    initializeAudio()
+    pygame.display.init()
+    pygame.font.init()
+
+    screen = pygame.display.set_mode((screen_width, screen_height))
+
+    pygame.display.set_caption("Flappy Bird")
+    icon = pygame.image.load("extras/bird2.png").convert_alpha()
+    pygame.display.set_icon(icon)
+
+    return screen
+
+
+def createTrainingHud(font, generation=0):
+    # the labels drawn over training generations and their replays (no generation label if it is None)
+    info = Hud(font)
+    info.addLabel("score", "Score: {}", (5, 5))
+    if generation is not None:
+        info.addLabel("generation", "Generation: {}", (screen_width - 190, 5), generation)
+    info.addLabel("alive", "Alive: {}", (screen_width - 190, 30))
+    return info
+
+
+def animateBird(animation_frame_count, frame, animation_time):
+    # the animation frame count and animation frame of a bird in its next frame
+    animation_frame_count += 1
+    if animation_frame_count < animation_time / 4:
+        frame = 0
+    elif animation_frame_count < 2 * animation_time / 4:
+        frame = 1
+    elif animation_frame_count < 3 * animation_time / 4:
+        frame = 2
+    elif animation_frame_count < animation_time:
+        frame = 1
+    else:
+        animation_frame_count = 0
+    return animation_frame_count, frame
+
+
+def drawBird(screen, rotated_images, frame, speed, left, top):
+    # a bird tilted up while it rises and down while it falls, left and top are those of its rect
+    rotated_image, (x, y) = rotated_images[frame, -25 if speed > 0 else 25]
+    return screen.blit(rotated_image, (left + x, top + y))
+
+
+def createObstacles(settings, images, course, frame):
+    # the land and the pipe pairs on screen in a frame of a fixed timestep, the sprites Game has moved there
+    # by then (for playbacks that jump between frames)
+    obstacles = pygame.sprite.LayeredUpdates()
+    pipe = course.pipeCount(frame) - 1
+    while pipe >= 0 and course.pipeX(pipe, frame) + pipe_width >= 0:
+        for position in ("top", "bottom"):
+            obstacles.add(Pipes(position, course.gap(pipe), images["pipe"], settings, course.pipeX(pipe, frame)))
+        pipe -= 1
+
+    for position in ("top", "bottom"):
+        surface = Land(position, images["land"], settings["horizontal_speed"])
+        surface.rect.x = course.landX(frame)
+        obstacles.add(surface)
+    return obstacles
+
+
+class Player(pygame.sprite.Sprite):
+    # time is counted in milliseconds (pygame.time.get_ticks) or in frames, time_unit is its units per second
+
+    def __init__(self, settings, player_images, time_of_press, time_unit, is_human=False):
+        super(Player, self).__init__()
+        self._layer = 0
+        self.score = 0
+        self.x_coordinate = screen_width / 3
+        self.y_coordinate = screen_height / 2
+        self.g = settings["g"]
+        self.speed_on_press = -settings["player_speed"]
+        self.speed = 0
+        self.time_since_press = 0
+        self.time_of_press = time_of_press  # start time
+        self.time_unit = time_unit
+        self.pressed = False
+        self.is_human = is_human
+        self.is_alive = True
+
+        self.animation_time = settings["FPS"] / 3  # 3 animations every second
+        self.animation_frame_count = 0             # counts number of frames passed
+
+        self.images = player_images
+        self.rotated_images = assets.getRotatedImages(player_images)
+        self.frame = 2  # index of the current animation frame
+        self.surface = self.images[self.frame]
+        self.rect = self.surface.get_rect(center=(self.x_coordinate, self.y_coordinate))
+
+    def runMotionEngine(self):
+        self.speed = self.speed_on_press + self.g * self.time_since_press
+        self.y_coordinate += self.speed_on_press * self.time_since_press + 0.5 * self.g * self.time_since_press ** 2
+
+    def readKeyboard(self):
+        # whether the human player flaps (on press, hold not allowed)
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_UP] and not self.pressed:
+            self.pressed = True
+            return True
+        if not keys[pygame.K_UP]:
+            self.pressed = False
+        return False
+
+    def movePlayerOnScreen(self, flap, now):
+        if flap:
+            self.rect.move_ip(0, self.speed_on_press)
+            self.time_since_press = 0
+            self.time_of_press = now
+
+        else:
+            self.rect.move_ip(0, self.speed)
+            self.time_since_press = (now - self.time_of_press) / self.time_unit
+
+        self.animatePlayer()
+
+        # prevent player from going off screen
+        if self.rect.top < 0:
+            self.rect.top = 0
+        if self.rect.bottom > screen_height:
+            self.rect.bottom = screen_height
+
+    def animatePlayer(self):
+        self.animation_frame_count, self.frame = animateBird(self.animation_frame_count, self.frame,
+                                                             self.animation_time)
+        self.surface = self.images[self.frame]
+
+
+class Land(pygame.sprite.Sprite):
+    def __init__(self, position, land_images, horizontal_speed):
+        super(Land, self).__init__()
+        self._layer = 2
+        self.position = position
+        self.image = land_images[position]  # flipped once when loaded
+        self.horizontal_speed = horizontal_speed
+
+        if self.position == "top":
+            self.rect = self.image.get_rect(center=(screen_width, land_thickness / 2))
+        if self.position == "bottom":
+            self.rect = self.image.get_rect(center=(screen_width, screen_height - land_thickness / 2))
+
+    def moveHorizontal(self):
+        self.rect.move_ip(-self.horizontal_speed, 0)
+
+
+class Pipes(pygame.sprite.Sprite):
+    def __init__(self, position, top_coordinate, pipe_images, settings, left=screen_width):
+        super(Pipes, self).__init__()
+        self._layer = 1
+        self.position = position
+        self.image = pipe_images[position]  # flipped once when loaded
+        self.horizontal_speed = settings["horizontal_speed"]
+
+        if self.position == "top":
+            self.top_coordinate = top_coordinate
+            self.rect = self.image.get_rect(bottomleft=(left, self.top_coordinate))
+        if self.position == "bottom":
+            self.top_coordinate = top_coordinate + settings["distance_between_pipes"]
+            self.rect = self.image.get_rect(topleft=(left, self.top_coordinate))
+
+    def moveHorizontal(self):
+        self.rect.move_ip(-self.horizontal_speed, 0)
+
+
+class Game:
+    # the sprites of one round: the land, the pipes of a course (a seeded one or a random one) and the players.
+    # With a fixed timestep (training) time is counted in frames, else in milliseconds of real time.
+    # New pipes appear at pipe_left (their left edge)
+
+    def __init__(self, settings, images, seed=None, fixed_timestep=False, pipe_left=screen_width):
+        self.settings = settings
+        self.images = images
+        self.course = getCourse(settings, seed)
+        self.fixed_timestep = fixed_timestep
+        self.time_unit = settings["FPS"] if fixed_timestep else 1000
+        self.pipe_left = pipe_left
+        self.horizontal_distance_between_pipes = screen_width / settings["horizontal_distance_between_pipes"]
+        self.frame_count = 0   # frames played, the time of a fixed timestep
+        self.pipes_created = 0  # pipe pairs of the course created so far
+
+        # sprites and sprite groups
+        self.obstacles = pygame.sprite.LayeredUpdates()
+        self.surfaces = []
+        self.players = []
+        self.pipes = collections.deque()
+        self.passed_pipes = collections.deque()
+
+        self.createPipes()
+        self.createSurfaces()
+
+    def now(self):
+        return self.frame_count if self.fixed_timestep else pygame.time.get_ticks()
+
+    def createPlayer(self, player_images, is_human=False):
+        player = Player(self.settings, player_images, self.now(), self.time_unit, is_human)
+        self.players.append(player)
+        return player
+
+    def createSurfaces(self):
+        top_surface = Land("top", self.images["land"], self.settings["horizontal_speed"])
+        bottom_surface = Land("bottom", self.images["land"], self.settings["horizontal_speed"])
+        self.obstacles.add(top_surface), self.surfaces.append(top_surface)
+        self.obstacles.add(bottom_surface), self.surfaces.append(bottom_surface)
+
+    def createPipes(self):
+        top_coordinate = self.course.gap(self.pipes_created)
+        self.pipes_created += 1
+        top_pipe = Pipes("top", top_coordinate, self.images["pipe"], self.settings, self.pipe_left)
+        bottom_pipe = Pipes("bottom", top_coordinate, self.images["pipe"], self.settings, self.pipe_left)
+        self.obstacles.add(top_pipe), self.pipes.append(top_pipe)
+        self.obstacles.add(bottom_pipe), self.pipes.append(bottom_pipe)
+
+    def moveObstacles(self):
+        for obstacle in self.obstacles:
+            obstacle.moveHorizontal()
+
+        if screen_width - self.pipes[-1].rect.right > self.horizontal_distance_between_pipes:
+            self.createPipes()
+        if len(self.passed_pipes) > 0 and self.passed_pipes[0].rect.right < 0:
+            self.passed_pipes[0].kill()
+            self.passed_pipes[1].kill()
+            self.passed_pipes.popleft(), self.passed_pipes.popleft()
+
+        if self.surfaces[0].rect.right <= screen_width:
+            self.surfaces[0].kill()
+            self.surfaces[1].kill()
+            self.surfaces.clear()
+            self.createSurfaces()
+
+    def movePlayer(self, player, flap):
+        player.movePlayerOnScreen(flap, self.now())
+
+    def passPipes(self):
+        # whether the players (who all share a column) passed the next pipe pair in this frame
+        if self.pipes[0].rect.right < self.players[0].rect.left:
+            self.passed_pipes.append(self.pipes.popleft())
+            self.passed_pipes.append(self.pipes.popleft())
+            return True
+        return False
+
+    def checkCollision(self, player):
+        # only the land and the pipes level with the player can be hit
+        hitboxes = collision.getSpriteHitboxes(player.rect, (surface.rect for surface in self.surfaces),
+                                               (pipe.rect for pipe in self.pipes))
+        return collision.collideHitbox(collision.shrinkRect(*player.rect), hitboxes)
+
+    def getNetworkInputs(self, player):
+        # 1) y coordinate of player
+        # 2) horizontal distance from nearest pipe
+        # 3) vertical distance from top pipe
+        # 4) vertical distance from bottom pipe
+        return (player.y_coordinate / 200,
+                abs(player.rect.centerx - self.pipes[0].rect.centerx) / 100,
+                abs(player.rect.centery - self.pipes[0].rect.bottom) / 100,
+                abs(player.rect.centery - self.pipes[1].rect.top) / 100)
+
+    def drawPlayers(self, screen):
+        rects = []
+        for player in self.players:
+            if player.is_alive:
+                rects.append(drawBird(screen, player.rotated_images, player.frame, player.speed,
+                                      player.rect.x, player.rect.y))
+        return rects
+
+    def draw(self, renderer, *draw_functions):
+        # the obstacles, the living players and then whatever draw_functions blit (see Renderer.draw)
+        renderer.draw(self.obstacles, self.drawPlayers, *draw_functions)
@@ -0,0 +1,134 @@
+import os
+import sys
+import copy
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+# standard output can be the video, pygame must not print to it when it is imported
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+import assets
+import engine
+import replay
+import simulation
+from course import screen_width, screen_height
+
+# frames drawn by a worker per task (about 170 MB of raw video)
+frames_per_task = 120
+
+_worker = {}  # the hidden display, images and recording of a worker process
+
+
+def getFrameRanges(frame_count, size=frames_per_task):
+    return [(start, min(start + size, frame_count)) for start in range(0, frame_count, size)]
+
+
+def getSnapshots(recording, birds, starts):
+    # the playback state (population, animation frame count, animation frame) at every start frame,
+    # so workers draw their range of frames without simulating the frames before it again
+    population, course, decide = recording.createPlayback(birds)
+    animation = 0, 2
+    snapshots = {}
+    for start in starts:
+        while population.frame_count < start:
+            simulation.simulateFrame(population, course, decide)
+            animation = engine.animateBird(*animation, recording.settings["FPS"] / 3)
+        snapshots[start] = copy.deepcopy(population), animation
+    return snapshots
+
+
+def initializeWorker(replay_path, birds):
+    # workers draw on the surface of the dummy video driver (images are converted for it), without SDL's
+    # signal handlers, which would keep the pool from terminating its workers
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+    _worker["screen"] = engine.initializeGame(fast=True)
+    _worker["images"] = assets.loadAssets(assets.game_assets)
+    _worker["recording"] = replay.Replay(replay_path)
+    _worker["birds"] = birds
+
+
+def drawRange(task):
+    # draws the frames from start to end as numbered image files in directory,
+    # or as raw RGB video to a file in directory whose path is returned
+    (start, end), (population, animation), directory, image_format = task
+    screen, images, recording = _worker["screen"], _worker["images"], _worker["recording"]
+    hud = engine.createTrainingHud(images["font"], recording.generation)
+    _, course, decide = recording.createPlayback(_worker["birds"], population)
+
+    video_path = os.path.join(directory, f"frames-{start:06d}.raw")
+    video = open(video_path, "wb") if image_format == "raw" else None
+    for frame in range(start, end):
+        replay.drawFrame(screen, images, hud, recording.settings, course, population, animation[1])
+        if video is not None:
+            video.write(pygame.image.tobytes(screen, "RGB"))
+        else:
+            pygame.image.save(screen, os.path.join(directory, f"frame-{frame:06d}.{image_format}"))
+
+        simulation.simulateFrame(population, course, decide)
+        animation = engine.animateBird(*animation, recording.settings["FPS"] / 3)
+
+    if video is not None:
+        video.close()
+        return video_path
+
+
+def exportReplay(replay_path, birds, output, image_format="png", workers=None, frames=None):
+    # draws every frame of the playback (or the first frames) with a pool of processes, as image files
+    # numbered from 0 in the output directory or as raw video to the output file ("-" for standard output)
+    recording = replay.Replay(replay_path)
+    frame_count = recording.frame_count + 1  # the last frame shows the end of the generation
+    if frames is not None:
+        frame_count = min(frame_count, frames)
+
+    ranges = getFrameRanges(frame_count)
+    snapshots = getSnapshots(recording, birds, [start for start, _ in ranges])
+
+    with multiprocessing.Pool(workers, initializeWorker, (replay_path, birds)) as pool:
+        if image_format != "raw":
+            os.makedirs(output, exist_ok=True)
+            tasks = [(frame_range, snapshots[frame_range[0]], output, image_format) for frame_range in ranges]
+            for _ in pool.imap_unordered(drawRange, tasks):
+                pass
+            return frame_count
+
+        # ranges are drawn to temporary files and appended to the video in order as soon as they are done
+        with tempfile.TemporaryDirectory() as directory:
+            tasks = [(frame_range, snapshots[frame_range[0]], directory, image_format) for frame_range in ranges]
+            video = sys.stdout.buffer if output == "-" else open(output, "wb")
+            try:
+                for video_path in pool.imap(drawRange, tasks):
+                    with open(video_path, "rb") as part:
+                        shutil.copyfileobj(part, video)
+                    os.remove(video_path)
+            finally:
+                if video is not sys.stdout.buffer:
+                    video.close()
+    return frame_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Draw a generation recorded by train-ai.py --record to "
+                                                 "image files or raw video with a pool of processes")
+    parser.add_argument("replay", help="recorded generation (.npz)")
+    parser.add_argument("output", help="directory for the image files, or file for raw video (- for standard output)")
+    parser.add_argument("--genomes", type=int, nargs="+", metavar="KEY",
+                        help="keys of the genomes to draw (every genome of the generation if not given)")
+    parser.add_argument("--best", action="store_true", help="only draw the genome with the best fitness")
+    parser.add_argument("--format", choices=["png", "bmp", "raw"], default="png",
+                        help="numbered image files, or raw RGB video (800x600 at the game's FPS)")
+    parser.add_argument("--workers", type=int, help="number of processes drawing frames (one per CPU if not given)")
+    parser.add_argument("--frames", type=int, help="only draw the first FRAMES frames")
+    args = parser.parse_args()
+
+    recording = replay.Replay(args.replay)
+    birds = recording.selectBirds(args.genomes, args.best)
+
+    start = time.perf_counter()
+    frame_count = exportReplay(args.replay, birds, args.output, args.format, args.workers, args.frames)
+    print(f"drew {frame_count} frames in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    if args.format == "raw" and args.output != "-":
+        print(f"encode with: ffmpeg -f rawvideo -pix_fmt rgb24 -s {screen_width}x{screen_height} "
+              f"-r {recording.settings['FPS']} -i {args.output} video.mp4", file=sys.stderr)
@@ -0,0 +1,28 @@
+class Hud:
+    # text labels that keep their rendered surface and are only rendered again when their value changes
+
+    def __init__(self, font, color=(0, 0, 0)):
+        self.font = font
+        self.color = color
+        self.labels = {}
+
+    def addLabel(self, name, text, position, value=0):
+        # text is a format string for the value, e.g. "Score: {}"
+        self.labels[name] = {"text": text, "position": position, "value": None, "surface": None}
+        self.setValue(name, value)
+
+    def getValue(self, name):
+        return self.labels[name]["value"]
+
+    def setValue(self, name, value):
+        label = self.labels[name]
+        if label["value"] != value or label["surface"] is None:
+            label["value"] = value
+            label["surface"] = self.font.render(label["text"].format(value), False, self.color)
+
+    def changeValue(self, name, change):
+        # for counters such as the number of birds alive
+        self.setValue(name, self.labels[name]["value"] + change)
+
+    def draw(self, screen):
+        return [screen.blit(label["surface"], label["position"]) for label in self.labels.values()]
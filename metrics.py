@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import collections
+import numpy as np
+import neat
+
+
+def summarize(values, percentiles=(10, 50, 90)):
+    # mean, std, min, percentiles and max of a list of numbers
+    values = np.asarray(values, dtype=np.float64)
+    summary = {"mean": float(values.mean()), "std": float(values.std()), "min": float(values.min())}
+    for percentile, value in zip(percentiles, np.percentile(values, percentiles)):
+        summary[f"p{percentile}"] = float(value)
+    summary["max"] = float(values.max())
+    return summary
+
+
+class MetricsReporter(neat.reporting.BaseReporter):
+    # appends one JSON line of metrics per generation to a log that can be tailed while training and
+    # keeps only the metrics of the last history generations in memory (unlike neat.StatisticsReporter,
+    # which keeps every generation's best genome and fitness lists)
+
+    def __init__(self, path="training-metrics.jsonl", history=100):
+        self.path = path
+        self.recent = collections.deque(maxlen=history)  # metrics of the last history generations
+        self.best_fitness = None                         # best fitness of the whole run
+        self.current_generation = None
+        self.last_time = time.time()
+
+    def truncate(self, generation):
+        # removes the lines of generation and later ones (played again after resuming from a checkpoint),
+        # reading and writing the log line by line
+        if not os.path.exists(self.path):
+            return
+        temporary_path = self.path + ".tmp"
+        with open(self.path) as log, open(temporary_path, "w") as kept:
+            for line in log:
+                try:
+                    if json.loads(line)["generation"] < generation:
+                        kept.write(line)
+                except (ValueError, KeyError):
+                    pass  # a line cut off when the process was killed
+        os.replace(temporary_path, self.path)
+
+    def start_generation(self, generation):
+        self.current_generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        # wall time since the previous generation was evaluated (reproduction included)
+        now = time.time()
+        seconds, self.last_time = now - self.last_time, now
+
+        genomes = list(population.values())
+        metrics = {"generation": self.current_generation,
+                   "time": now,
+                   "seconds": seconds,
+                   "population": len(genomes),
+                   "best_genome": best_genome.key,
+                   "fitness": summarize([genome.fitness for genome in genomes]),
+                   "species": {"count": len(species.species),
+                               "sizes": {str(key): len(s.members) for key, s in species.species.items()}}}
+
+        # set by the game loops along with the fitness (missing for genomes evaluated some other way)
+        if all(hasattr(genome, "frames_alive") for genome in genomes):
+            metrics["frames_alive"] = summarize([genome.frames_alive for genome in genomes])
+            metrics["pipes_passed"] = summarize([genome.pipes_passed for genome in genomes])
+
+        if self.best_fitness is None or best_genome.fitness > self.best_fitness:
+            self.best_fitness = best_genome.fitness
+        metrics["best_fitness_so_far"] = self.best_fitness
+
+        self.recent.append(metrics)
+        with open(self.path, "a") as log:
+            log.write(json.dumps(metrics) + "\n")
+
+    def getState(self):
+        # what a checkpoint keeps to continue the summaries
+        return {"recent": list(self.recent), "best fitness": self.best_fitness}
+
+    def setState(self, state):
+        self.recent.extend(state["recent"])
+        self.best_fitness = state["best fitness"]
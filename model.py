@@ -0,0 +1,189 @@
+import sys
+import math
+import random
+import numpy as np
+
+# version of the model file layout, increased whenever the arrays saved in a model change
+model_version = 1
+
+# the activation functions of neat.activations a model can use
+activation_functions = {
+    "sigmoid_activation": lambda z: 1.0 / (1.0 + math.exp(-max(-60.0, min(60.0, 5.0 * z)))),
+    "tanh_activation": lambda z: math.tanh(max(-60.0, min(60.0, 2.5 * z))),
+    "relu_activation": lambda z: z if z > 0.0 else 0.0,
+    "identity_activation": lambda z: z,
+    "clamped_activation": lambda z: max(-1.0, min(1.0, z)),
+}
+
+# the same functions as expressions of z for compiled networks
+activation_expressions = {
+    "sigmoid_activation": "1.0 / (1.0 + exp(-max(-60.0, min(60.0, 5.0 * {z}))))",
+    "tanh_activation": "tanh(max(-60.0, min(60.0, 2.5 * {z})))",
+    "relu_activation": "{z} if {z} > 0.0 else 0.0",
+    "identity_activation": "{z}",
+    "clamped_activation": "max(-1.0, min(1.0, {z}))",
+}
+
+# the built-in sum (used by neat's sum aggregation) adds floats one after another before Python 3.12
+# and with compensated summation since, compiled networks add the same way
+sequential_sum = sum([1e100, 1.0, -1e100]) == 0.0
+
+
+def saveModel(network, path, fitness=float("nan")):
+    # saves a neat.nn.FeedForwardNetwork as flat arrays in a .npz file. Values are numbered inputs first,
+    # then nodes in evaluation order, then a value that is always 0 (for outputs that are never evaluated)
+    num_inputs = len(network.input_nodes)
+    num_nodes = len(network.node_evals)
+    indices = {key: index for index, key in enumerate(network.input_nodes)}
+    for index, (node, *_) in enumerate(network.node_evals):
+        indices[node] = num_inputs + index
+    zero_index = num_inputs + num_nodes
+
+    activation_names = []
+    activations, biases, responses = [], [], []
+    link_offsets, link_sources, link_weights = [0], [], []
+    for node, act_func, agg_func, bias, response, links in network.node_evals:
+        if agg_func.__name__ != "sum_aggregation":
+            raise ValueError(f"Aggregation function {agg_func.__name__} can not be saved")
+        if act_func.__name__ not in activation_functions:
+            raise ValueError(f"Activation function {act_func.__name__} can not be saved")
+        if act_func.__name__ not in activation_names:
+            activation_names.append(act_func.__name__)
+
+        activations.append(activation_names.index(act_func.__name__))
+        biases.append(bias)
+        responses.append(response)
+        for key, weight in links:
+            link_sources.append(indices.get(key, zero_index))
+            link_weights.append(weight)
+        link_offsets.append(len(link_sources))
+
+    with open(path, "wb") as file:
+        np.savez_compressed(file,
+                            version=np.array(model_version),
+                            fitness=np.array(fitness, dtype=np.float64),
+                            num_inputs=np.array(num_inputs),
+                            node_keys=np.array([node for node, *_ in network.node_evals], dtype=np.int64),
+                            activation_names=np.array(activation_names, dtype=np.str_),
+                            activations=np.array(activations, dtype=np.int32),
+                            biases=np.array(biases, dtype=np.float64),
+                            responses=np.array(responses, dtype=np.float64),
+                            link_offsets=np.array(link_offsets, dtype=np.int32),
+                            link_sources=np.array(link_sources, dtype=np.int32),
+                            link_weights=np.array(link_weights, dtype=np.float64),
+                            outputs=np.array([indices.get(key, zero_index) for key in network.output_nodes],
+                                             dtype=np.int32))
+
+    verifyModel(network, path)
+
+
+def verifyModel(network, path, samples=1000):
+    # the saved model, loaded and compiled, has to give the same outputs as the network it was saved from
+    compiled_network = Model(path).compile()
+    generator = random.Random(0)  # training runs use the global random state
+    for _ in range(samples):
+        inputs = [generator.uniform(-5.0, 5.0) for _ in network.input_nodes]
+        if compiled_network.activate(inputs) != network.activate(inputs):
+            raise ValueError(f"{path} does not give the same outputs as the network it was saved from")
+
+
+class Model:
+    # a network loaded from a model file, activate gives the same outputs as neat.nn.FeedForwardNetwork
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            self.version = int(arrays["version"])
+            if self.version != model_version:
+                raise ValueError(f"{path} is a version {self.version} model, expected version {model_version}")
+
+            self.fitness = float(arrays["fitness"])
+            self.num_inputs = int(arrays["num_inputs"])
+            self.node_keys = arrays["node_keys"].tolist()
+            self.activation_names = arrays["activation_names"].tolist()
+            self.activations = arrays["activations"].tolist()
+            self.biases = arrays["biases"].tolist()
+            self.responses = arrays["responses"].tolist()
+            self.link_offsets = arrays["link_offsets"].tolist()
+            self.link_sources = arrays["link_sources"].tolist()
+            self.link_weights = arrays["link_weights"].tolist()
+            self.outputs = arrays["outputs"].tolist()
+
+        for name in self.activation_names:
+            if name not in activation_functions:
+                raise ValueError(f"{path} uses the unknown activation function {name}")
+
+        # (value index, activation, bias, response, links) of every node in evaluation order
+        self.node_evals = []
+        for node in range(len(self.node_keys)):
+            start, end = self.link_offsets[node], self.link_offsets[node + 1]
+            self.node_evals.append((self.num_inputs + node,
+                                    activation_functions[self.activation_names[self.activations[node]]],
+                                    self.biases[node], self.responses[node],
+                                    list(zip(self.link_sources[start:end], self.link_weights[start:end]))))
+
+    def activate(self, inputs):
+        if len(inputs) != self.num_inputs:
+            raise RuntimeError(f"Expected {self.num_inputs} inputs, got {len(inputs)}")
+
+        values = list(inputs) + [0.0] * (len(self.node_evals) + 1)
+        for index, act_func, bias, response, links in self.node_evals:
+            # summed in the same order as neat's sum aggregation
+            values[index] = act_func(bias + response * sum([values[source] * weight for source, weight in links]))
+        return [values[index] for index in self.outputs]
+
+    def compile(self):
+        return CompiledNetwork(self)
+
+
+class CompiledNetwork:
+    # a model compiled to a function of straight-line code in evaluation order. Values are local variables
+    # and outputs are written to a list reused by every call (copy it to keep it), so activate builds no
+    # lists or dicts and looks nothing up per node
+
+    def __init__(self, model):
+        self.num_inputs = model.num_inputs
+        self.outputs = [0.0] * len(model.outputs)
+
+        inputs = [f"v{index}" for index in range(model.num_inputs)]
+        lines = ["def activate(inputs, outputs=outputs):",
+                 f"    {', '.join(inputs)}, = inputs"]
+        for index, act_func, bias, response, links in model.node_evals:
+            products = [f"v{source} * {weight!r}" for source, weight in links]
+            if sequential_sum:
+                total = " + ".join(["0.0"] + products)
+            else:
+                total = f"sum(({', '.join(products)},))" if products else "0.0"
+            name = model.activation_names[model.activations[index - model.num_inputs]]
+            lines.append(f"    z = {bias!r} + {response!r} * ({total})")
+            lines.append(f"    v{index} = {activation_expressions[name].format(z='z')}")
+        lines.append(f"    v{model.num_inputs + len(model.node_evals)} = 0.0")
+        for position, index in enumerate(model.outputs):
+            lines.append(f"    outputs[{position}] = v{index}")
+        lines.append("    return outputs")
+
+        self.source = "\n".join(lines)
+        namespace = {"outputs": self.outputs, "exp": math.exp, "tanh": math.tanh, "inf": math.inf, "nan": math.nan}
+        exec(compile(self.source, "<compiled network>", "exec"), namespace)
+        self.activate = namespace["activate"]
+
+
+def convertModel(pickle_path, config_path, model_path):
+    # converts a pickled neat genome (as saved by older versions of train-ai.py) to a model file
+    import pickle
+    import neat
+
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                neat.DefaultSpeciesSet, neat.DefaultStagnation, config_path)
+    with open(pickle_path, "rb") as file:
+        genome = pickle.load(file)
+
+    fitness = float("nan") if genome.fitness is None else genome.fitness
+    saveModel(neat.nn.FeedForwardNetwork.create(genome, config), model_path, fitness)
+
+
+if __name__ == "__main__":
+    # python model.py models/trained-model1.pickle ... converts every pickle to a .npz file next to it
+    for pickle_path in sys.argv[1:]:
+        model_path = pickle_path.rsplit(".", 1)[0] + ".npz"
+        convertModel(pickle_path, "neat-config.cfg", model_path)
+        print(f"{pickle_path} -> {model_path}")
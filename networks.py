@@ -0,0 +1,121 @@
+import numpy as np
+import neat
+
+# numpy versions of the activation functions in neat.activations
+# (np.minimum / np.maximum have less call overhead than np.clip)
+activation_functions = {
+    "sigmoid_activation": lambda z: 1.0 / (1.0 + np.exp(-np.minimum(np.maximum(5.0 * z, -60.0), 60.0))),
+    "tanh_activation": lambda z: np.tanh(np.minimum(np.maximum(2.5 * z, -60.0), 60.0)),
+    "relu_activation": lambda z: np.where(z > 0.0, z, 0.0),
+    "identity_activation": lambda z: z,
+    "clamped_activation": lambda z: np.minimum(np.maximum(z, -1.0), 1.0),
+}
+
+
+class BatchedNetworks:
+    # feed forward networks of a whole population compiled into padded arrays (one row per network),
+    # so a single call of activate evaluates every bird of a frame
+
+    def __init__(self, networks):
+        self.size = len(networks)
+        self.num_inputs = len(networks[0].input_nodes)
+        num_nodes = max(len(net.node_evals) for net in networks)
+
+        # columns of the value array: inputs, evaluated nodes, a column that is always 0
+        # for links from nodes that are never evaluated, and a scratch column written by padding
+        self.width = self.num_inputs + num_nodes + 2
+        zero_column, scratch_column = self.width - 2, self.width - 1
+
+        self.activation_names = []
+        self.outputs = np.full((self.size, len(networks[0].output_nodes)), zero_column)
+
+        # nodes of every network grouped by depth, nodes in a layer only depend on earlier layers
+        network_layers = []
+        for row, net in enumerate(networks):
+            columns = {key: column for column, key in enumerate(net.input_nodes)}
+            depths = {}
+            layers = []
+
+            for node, act_func, agg_func, bias, response, links in net.node_evals:
+                if agg_func.__name__ != "sum_aggregation":
+                    raise ValueError(f"Aggregation function {agg_func.__name__} can not be batched")
+                if act_func.__name__ not in activation_functions:
+                    raise ValueError(f"Activation function {act_func.__name__} can not be batched")
+                if act_func.__name__ not in self.activation_names:
+                    self.activation_names.append(act_func.__name__)
+
+                depth = max((depths[key] + 1 for key, _ in links if key in depths), default=0)
+                if depth == len(layers):
+                    layers.append([])
+
+                links = [(columns.get(key, zero_column), weight) for key, weight in links]
+                columns[node] = self.num_inputs + len(depths)
+                depths[node] = depth
+                layers[depth].append((columns[node], self.activation_names.index(act_func.__name__),
+                                      bias, response, links))
+
+            for index, key in enumerate(net.output_nodes):
+                self.outputs[row, index] = columns.get(key, zero_column)
+            network_layers.append(layers)
+
+        # pad every layer to the widest layer and the largest number of links in the population
+        self.layers = []
+        for depth in range(max(len(layers) for layers in network_layers)):
+            nodes = [layers[depth] if depth < len(layers) else [] for layers in network_layers]
+            num_layer_nodes = max(len(layer) for layer in nodes)
+            num_links = max((len(links) for layer in nodes for *_, links in layer), default=0)
+
+            columns = np.full((self.size, num_layer_nodes), scratch_column)
+            activations = np.zeros((self.size, num_layer_nodes), dtype=np.int64)
+            biases = np.zeros((self.size, num_layer_nodes))
+            responses = np.zeros((self.size, num_layer_nodes))
+            sources = np.full((self.size, num_layer_nodes, num_links), zero_column)
+            weights = np.zeros((self.size, num_layer_nodes, num_links))
+
+            for row, layer in enumerate(nodes):
+                for position, (column, activation, bias, response, links) in enumerate(layer):
+                    columns[row, position] = column
+                    activations[row, position] = activation
+                    biases[row, position] = bias
+                    responses[row, position] = response
+                    for link, (source, weight) in enumerate(links):
+                        sources[row, position, link] = source
+                        weights[row, position, link] = weight
+
+            self.layers.append((columns, activations, biases, responses, sources, weights))
+
+    @staticmethod
+    def create(genomes, config):
+        return BatchedNetworks([neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes])
+
+    def activate(self, inputs, index=None):
+        # outputs of the networks in index (all networks if None) for one row of inputs each
+        if index is None:
+            index = np.arange(self.size)
+        rows = np.arange(len(index))[:, None]
+
+        values = np.zeros((len(index), self.width))
+        values[:, :self.num_inputs] = inputs
+
+        for columns, activations, biases, responses, sources, weights in self.layers:
+            sources = sources[index]
+            weights = weights[index]
+
+            # links are summed in the same order as neat's sum aggregation
+            total = np.zeros(sources.shape[:2])
+            for link in range(sources.shape[2]):
+                total += values[rows, sources[:, :, link]] * weights[:, :, link]
+            total = biases[index] + responses[index] * total
+
+            if len(self.activation_names) == 1:
+                outputs = activation_functions[self.activation_names[0]](total)
+            else:
+                outputs = np.empty_like(total)
+                activations = activations[index]
+                for code, name in enumerate(self.activation_names):
+                    mask = activations == code
+                    outputs[mask] = activation_functions[name](total[mask])
+
+            values[rows, columns[index]] = outputs
+
+        return values[rows, self.outputs[index]]
@@ -0,0 +1,74 @@
+import multiprocessing
+import numpy as np
+import simulation
+
+
+def evaluateChunk(genomes, config, settings, seed, max_frames=None, record=False):
+    recorder = simulation.FlapRecorder(len(genomes)) if record else None
+    population = simulation.simulateGenomes(genomes, config, settings, seed, max_frames, recorder)
+    flaps = recorder.birdFlaps(population.framesAlive()) if record else None
+    return population.fitness, population.quit_frames, population.framesAlive(), population.score, flaps
+
+
+def splitGenomes(genomes, number_of_chunks):
+    return [chunk for chunk in (genomes[index::number_of_chunks] for index in range(number_of_chunks)) if chunk]
+
+
+def mergeChunks(chunks, results, rerun, combine="mean"):
+    # birds never interact, except that a course is force quit for everyone once a bird passes
+    # simulation.max_score on it, so chunks that played a course longer than the earliest force quit
+    # of that course are rerun up to it (every course ends in its own frame)
+    quit_frames = np.stack([result[1] for result in results])
+    last_frames = np.where(quit_frames > 0, quit_frames, np.iinfo(np.int64).max).min(axis=0)
+    if np.any(quit_frames > 0):
+        # the last frame a bird of a chunk was alive in on each course
+        stale = [index for index, (chunk, (_, _, frames_alive, *_)) in enumerate(zip(chunks, results))
+                 if np.any(frames_alive.reshape(-1, len(chunk)).max(axis=1) > last_frames)]
+        for index, result in zip(stale, rerun([chunks[index] for index in stale], last_frames)):
+            results[index] = result
+
+    for chunk, (fitness, _, frames_alive, scores, _) in zip(chunks, results):
+        simulation.setResults(chunk, *simulation.combineResults(fitness, frames_alive, scores, len(chunk), combine))
+
+
+def evaluateChunks(genomes, config, settings, seed, number_of_chunks, run, record=False, combine="mean"):
+    # evaluates the genomes split into chunks, run(tasks) returns evaluateChunk(*task) of every task.
+    # Returns the flaps of every genome (simulation.FlapRecorder.birdFlaps) if record is True.
+    # Every chunk has to play the same courses, so no seed can be None (a random course per chunk)
+    if seed is None or isinstance(seed, (list, tuple)) and None in seed:
+        raise ValueError("chunks of a generation need a course seed to play the same course")
+    chunks = splitGenomes(genomes, number_of_chunks)
+    results = run([(chunk, config, settings, seed, None, record) for chunk in chunks])
+
+    def rerun(stale_chunks, last_frames):
+        return run([(chunk, config, settings, seed, last_frames, record) for chunk in stale_chunks])
+
+    mergeChunks(chunks, results, rerun, combine)
+
+    if record:
+        # chunk i holds every number_of_chunks-th genome from genome i
+        flaps = [None] * len(genomes)
+        for index, (*_, chunk_flaps) in enumerate(results):
+            flaps[index::number_of_chunks] = chunk_flaps
+        return flaps
+
+
+class ParallelEvaluator:
+    # splits each generation's genomes across worker processes that all simulate the same courses,
+    # fitness is identical to simulation.evaluateGenomes on the whole population
+
+    def __init__(self, num_workers, settings):
+        self.num_workers = num_workers
+        self.settings = settings
+        self.pool = multiprocessing.Pool(num_workers)
+
+    def evaluate(self, genomes, config, seed, record=False, combine="mean"):
+        return evaluateChunks(genomes, config, self.settings, seed, self.num_workers, self.run, record, combine)
+
+    def run(self, tasks):
+        jobs = [self.pool.apply_async(evaluateChunk, task) for task in tasks]
+        return [job.get() for job in jobs]
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,152 @@
+import csv
+import json
+import time
+
+# phases of a frame of the game loops
+game_phases = ("events", "draw", "obstacles", "score", "motion", "network", "collision", "display")
+
+# upper edges of the histogram buckets in seconds, 1 microsecond doubling up to about 1 second
+bucket_edges = [2 ** exponent / 1e6 for exponent in range(21)]
+
+
+class PhaseHistogram:
+    # how long one phase of the game loop took in every frame of a generation
+
+    def __init__(self):
+        self.frames = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(bucket_edges) + 1)  # the last bucket is for anything longer
+
+    def add(self, seconds):
+        self.frames += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        bucket = 0
+        while bucket < len(bucket_edges) and seconds > bucket_edges[bucket]:
+            bucket += 1
+        self.buckets[bucket] += 1
+
+    def percentile(self, fraction):
+        # upper edge of the bucket the percentile falls into (at most the longest time)
+        count = 0
+        for bucket, frames in enumerate(self.buckets):
+            count += frames
+            if count >= fraction * self.frames:
+                return min(bucket_edges[bucket], self.maximum) if bucket < len(bucket_edges) else self.maximum
+        return 0.0
+
+    def summary(self):
+        return {"frames": self.frames,
+                "total_ms": self.total * 1e3,
+                "mean_ms": self.total / self.frames * 1e3 if self.frames else 0.0,
+                "p50_ms": self.percentile(0.5) * 1e3,
+                "p90_ms": self.percentile(0.9) * 1e3,
+                "p99_ms": self.percentile(0.99) * 1e3,
+                "max_ms": self.maximum * 1e3,
+                "buckets": self.buckets}
+
+
+class FrameProfiler:
+    # times the phases of every frame of a game loop. mark(phase) adds the time since the previous mark to
+    # the phase (so a phase can be marked several times in a frame, e.g. once per player) and endFrame adds
+    # every phase's time to the histograms of the generation. A disabled profiler does nothing
+
+    def __init__(self, phases, enabled=True, path=None):
+        self.phases = phases
+        self.enabled = enabled
+        self.path = path            # .json or .csv file the histograms are written to after every generation
+        self.frame_times = dict.fromkeys(phases, 0.0)
+        self.histograms = {phase: PhaseHistogram() for phase in phases}
+        self.generations = []       # (generation, summaries of the phases) of every finished generation
+        self.last_mark = time.perf_counter()
+
+    def startFrame(self):
+        if self.enabled:
+            self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        if self.enabled:
+            now = time.perf_counter()
+            self.frame_times[phase] += now - self.last_mark
+            self.last_mark = now
+
+    def endFrame(self):
+        if self.enabled:
+            for phase, seconds in self.frame_times.items():
+                self.histograms[phase].add(seconds)
+                self.frame_times[phase] = 0.0
+
+    def meanTimes(self):
+        # mean milliseconds of every phase in the current generation so far
+        return {phase: histogram.total / histogram.frames * 1e3 if histogram.frames else 0.0
+                for phase, histogram in self.histograms.items()}
+
+    def endGeneration(self, generation):
+        # a generation without frames (e.g. one stopped before its first frame) is not kept
+        if not self.enabled or self.histograms[self.phases[0]].frames == 0:
+            return
+        self.generations.append((generation, {phase: histogram.summary()
+                                              for phase, histogram in self.histograms.items()}))
+        self.histograms = {phase: PhaseHistogram() for phase in self.phases}
+        if self.path is not None:
+            self.export(self.path)
+
+    def export(self, path):
+        if path.endswith(".csv"):
+            self.exportCsv(path)
+        else:
+            self.exportJson(path)
+
+    def exportJson(self, path):
+        with open(path, "w") as file:
+            json.dump({"bucket_edges_ms": [edge * 1e3 for edge in bucket_edges],
+                       "generations": [{"generation": generation, "phases": phases}
+                                       for generation, phases in self.generations]}, file, indent=2)
+
+    def exportCsv(self, path):
+        bucket_names = [f"<={edge * 1e3:g}ms" for edge in bucket_edges] + [f">{bucket_edges[-1] * 1e3:g}ms"]
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["generation", "phase", "frames", "total_ms", "mean_ms", "p50_ms", "p90_ms", "p99_ms",
+                             "max_ms"] + bucket_names)
+            for generation, phases in self.generations:
+                for phase, summary in phases.items():
+                    writer.writerow([generation, phase] + [summary[key] for key in
+                                                           ("frames", "total_ms", "mean_ms", "p50_ms", "p90_ms",
+                                                            "p99_ms", "max_ms")] + summary["buckets"])
+
+
+class ProfilerOverlay:
+    # the mean time of every phase drawn over the game, refreshed once a second so the text is not
+    # rendered again every frame
+
+    def __init__(self, profiler, hud, position, refresh_frames):
+        self.profiler = profiler
+        self.hud = hud
+        self.refresh_frames = refresh_frames
+        self.frame_count = 0
+
+        x, y = position
+        line_height = hud.font.get_linesize()
+        for line, phase in enumerate(profiler.phases):
+            hud.addLabel(phase, phase + ": {:.2f} ms", (x, y + line * line_height), 0.0)
+
+    def draw(self, screen):
+        if self.frame_count % self.refresh_frames == 0:
+            for phase, milliseconds in self.profiler.meanTimes().items():
+                self.hud.setValue(phase, round(milliseconds, 2))
+        self.frame_count += 1
+        return self.hud.draw(screen)
+
+
+def addProfilerArguments(parser):
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time the phases of every frame and write histograms of every generation "
+                             "to a .json or .csv file")
+    parser.add_argument("--profile-overlay", action="store_true",
+                        help="draw the mean time of every phase of the frames over the game")
+
+
+def createProfiler(args):
+    return FrameProfiler(game_phases, args.profile is not None or args.profile_overlay, args.profile)
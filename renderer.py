@@ -0,0 +1,35 @@
+import pygame
+
+
+class Renderer:
+    # redraws only the regions that changed since the last frame and pushes just those to the display.
+    # Everything drawn in the last frame is covered with the background again, then the obstacles are
+    # drawn in layer order and the players and text over them, so the screen looks the same as a full redraw
+
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.drawn_rects = []    # regions drawn in the last frame outside the obstacle group
+        self.dirty_rects = []    # regions of the screen changed in the current frame
+        self.full_update = True  # the first frame is drawn and pushed whole
+
+    def draw(self, obstacles, *draw_functions):
+        # draw_functions blit onto the screen over the obstacles and return the rects they drew
+        obstacles.clear(self.screen, self.background)
+        if self.full_update:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.drawn_rects:
+                self.screen.blit(self.background, rect, rect)
+
+        self.dirty_rects = obstacles.draw(self.screen) + self.drawn_rects
+        self.drawn_rects = [rect for draw in draw_functions for rect in draw(self.screen)]
+        self.dirty_rects += self.drawn_rects
+
+    def update(self):
+        if self.full_update:
+            pygame.display.flip()
+            self.full_update = False
+        else:
+            # birds often overlap exactly, each region is pushed once
+            pygame.display.update(list(dict.fromkeys(map(tuple, self.dirty_rects))))
@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pygame
+import assets
+import engine
+import simulation
+from course import screen_width, screen_height, getCourse
+
+# version of the replay file layout, increased whenever the arrays saved in a replay change
+replay_version = 1
+
+
+def saveReplay(path, genomes, settings, seed, flaps, generation):
+    # a generation as the course seed, the game settings and the flaps of every genome (packed into bits),
+    # with the results of the generation to check a playback against. The generation ended in the last
+    # frame a bird was alive in (when every bird had died or one passed simulation.max_score)
+    frame_count = max(genome.frames_alive for _, genome in genomes)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as file:
+        np.savez_compressed(file,
+                            version=np.array(replay_version),
+                            seed=np.array(seed, dtype=np.int64),
+                            generation=np.array(generation),
+                            setting_names=np.array(list(settings), dtype=np.str_),
+                            setting_values=np.array(list(settings.values()), dtype=np.float64),
+                            frame_count=np.array(frame_count),
+                            genome_keys=np.array([key for key, _ in genomes], dtype=np.int64),
+                            fitness=np.array([genome.fitness for _, genome in genomes], dtype=np.float64),
+                            frames_alive=np.array([genome.frames_alive for _, genome in genomes], dtype=np.int64),
+                            pipes_passed=np.array([genome.pipes_passed for _, genome in genomes], dtype=np.int64),
+                            flaps=np.packbits(np.concatenate(flaps)) if flaps else np.zeros(0, dtype=np.uint8))
+
+
+class Replay:
+    # a recorded generation that can be played again without its genomes
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            self.version = int(arrays["version"])
+            if self.version != replay_version:
+                raise ValueError(f"{path} is a version {self.version} replay, expected version {replay_version}")
+
+            self.seed = int(arrays["seed"])
+            self.generation = int(arrays["generation"]) if "generation" in arrays.files else None
+            self.settings = dict(zip(arrays["setting_names"].tolist(), arrays["setting_values"].tolist()))
+            self.settings["FPS"] = int(self.settings["FPS"])
+            self.frame_count = int(arrays["frame_count"])
+            self.genome_keys = arrays["genome_keys"]
+            self.fitness = arrays["fitness"]
+            self.frames_alive = arrays["frames_alive"]
+            self.pipes_passed = arrays["pipes_passed"]
+
+            # flaps of bird b are the frames_alive[b] bits from offsets[b]
+            self.offsets = np.concatenate(([0], np.cumsum(self.frames_alive)))
+            self.flaps = np.unpackbits(arrays["flaps"], count=int(self.offsets[-1])).astype(bool)
+
+    def birdIndex(self, genome_keys=None):
+        # positions of the genomes in the recording (every genome if None)
+        if genome_keys is None:
+            return np.arange(len(self.genome_keys))
+        positions = {key: position for position, key in enumerate(self.genome_keys.tolist())}
+        missing = [key for key in genome_keys if key not in positions]
+        if missing:
+            raise ValueError(f"genomes {missing} are not in the replay")
+        return np.array([positions[key] for key in genome_keys], dtype=np.int64)
+
+    def selectBirds(self, genome_keys=None, best=False):
+        # positions of the genome with the best fitness, of the given genomes or of every genome
+        if best:
+            return np.array([int(np.argmax(self.fitness))])
+        return self.birdIndex(genome_keys)
+
+    def createPlayback(self, birds, population=None):
+        # a population of the birds (or a copy of one taken during a playback of the same birds) and
+        # the decide function of simulation.simulate that replays their flaps
+        if population is None:
+            population = simulation.Population(len(birds), self.settings)
+        offsets = self.offsets[birds] - 1
+        frames_alive = self.frames_alive[birds]
+        last_flap = max(len(self.flaps) - 1, 0)
+
+        def decide(index, inputs):
+            # birds that live longer than they were recorded (their playback differs) do not flap
+            recorded = population.frame_count <= frames_alive[index]
+            flaps = self.flaps[np.minimum(offsets[index] + population.frame_count, last_flap)]
+            return (recorded & flaps).astype(np.float64)
+
+        return population, getCourse(self.settings, self.seed), decide
+
+    def simulate(self, birds):
+        # plays the birds again headless, up to the frame the recorded generation ended
+        # (birds still alive then were stopped by another bird passing simulation.max_score)
+        population, course, decide = self.createPlayback(birds)
+        simulation.simulate(population, course, decide, self.frame_count)
+        return population
+
+    def verify(self, birds):
+        # positions of the birds whose played-again results differ from the recorded ones
+        population = self.simulate(birds)
+        return birds[(population.fitness != self.fitness[birds]) |
+                     (population.framesAlive() != self.frames_alive[birds]) |
+                     (population.score != self.pipes_passed[birds])]
+
+
+def drawFrame(screen, images, hud, settings, course, population, animation_frame):
+    # the screen of train-ai.py's gameloop at the start of the next frame of the population,
+    # drawn with the sprites and the HUD of the game
+    screen.blit(images["background"], (0, 0))
+    engine.createObstacles(settings, images, course, population.frame_count).draw(screen)
+
+    rotated_images = assets.getRotatedImages(images["player"])
+    for bird in np.flatnonzero(population.alive):
+        engine.drawBird(screen, rotated_images, animation_frame, population.speed[bird],
+                        population.x, population.top[bird])
+
+    hud.setValue("score", int(population.score.max()))
+    hud.setValue("alive", int(population.alive.sum()))
+    hud.draw(screen)
+
+
+def watchReplay(replay, birds, frame_cap=True):
+    # plays the birds again in a window, in real time unless frame_cap is False
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((screen_width, screen_height))
+    pygame.display.set_caption("Flappy Bird replay")
+    images = assets.loadAssets(assets.game_assets)
+    hud = engine.createTrainingHud(images["font"], replay.generation)
+    clock = pygame.time.Clock()
+
+    population, course, decide = replay.createPlayback(birds)
+    fps = replay.settings["FPS"]
+    animation_frame_count, animation_frame = 0, 2
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+
+        drawFrame(screen, images, hud, replay.settings, course, population, animation_frame)
+        pygame.display.flip()
+
+        if not simulation.simulateFrame(population, course, decide) or population.frame_count >= replay.frame_count:
+            running = False
+        animation_frame_count, animation_frame = engine.animateBird(animation_frame_count, animation_frame, fps / 3)
+        if frame_cap:
+            clock.tick(fps)
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a generation recorded by train-ai.py --record again")
+    parser.add_argument("replay", help="recorded generation (.npz)")
+    parser.add_argument("--genomes", type=int, nargs="+", metavar="KEY",
+                        help="keys of the genomes to play (every genome of the generation if not given)")
+    parser.add_argument("--best", action="store_true", help="only play the genome with the best fitness")
+    parser.add_argument("--watch", action="store_true", help="draw the playback in a window")
+    parser.add_argument("--uncapped", action="store_true", help="do not cap the window at the game's FPS")
+    args = parser.parse_args()
+
+    replay = Replay(args.replay)
+    birds = replay.selectBirds(args.genomes, args.best)
+
+    if args.watch:
+        watchReplay(replay, birds, not args.uncapped)
+        sys.exit()
+
+    start = time.perf_counter()
+    mismatched = replay.verify(birds)
+    print(f"played {len(birds)} genomes for {replay.frame_count} frames in {time.perf_counter() - start:.3f} s")
+    for bird in birds[np.argsort(-replay.fitness[birds], kind="stable")][:10]:
+        print(f"genome {replay.genome_keys[bird]}: fitness {replay.fitness[bird]:.1f}, "
+              f"{replay.frames_alive[bird]} frames alive, {replay.pipes_passed[bird]} pipes passed")
+    if len(mismatched):
+        print(f"genomes {replay.genome_keys[mismatched].tolist()} do not reproduce their recorded results")
+        sys.exit(1)
+    print("every genome reproduces its recorded fitness")
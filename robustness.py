@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+import model
+import simulation
+from sweep import parseValues
+from course import loadSettings
+
+
+def createGrid(base_settings, grid):
+    # the game settings of every combination of the grid values (values take the type of the setting)
+    keys = list(grid)
+    return [{**base_settings, **{key: type(base_settings[key])(float(value)) for key, value in zip(keys, values)}}
+            for values in itertools.product(*grid.values())]
+
+
+def evaluateSettings(task):
+    # plays every model on every course of the seeds headless in one batch (bird k * number of models + m
+    # is model m on course k), each course ends once a bird passes max_pipes pipes
+    index, settings, model_paths, seeds, max_pipes = task
+    start = time.perf_counter()
+    networks = [model.Model(path).compile() for path in model_paths]
+    try:
+        course, course_index = simulation.createCourses(settings, list(seeds), len(networks))
+    except ValueError as error:
+        return {"cell": index, "error": str(error)}
+
+    population = simulation.Population(len(course_index), settings, course_index)
+    model_index = np.arange(len(course_index)) % len(networks)
+
+    def decide(index, inputs):
+        return np.array([networks[network].activate(row)[0]
+                         for network, row in zip(model_index[index].tolist(), inputs.tolist())])
+
+    def decideBird(bird, inputs):
+        return networks[model_index[bird]].activate(inputs)[0]
+
+    max_frames = course.passingFrame(max_pipes, population.x)
+    simulation.simulate(population, course, decide, max_frames, decide_bird=decideBird)
+
+    # one row per course, one column per model
+    pipes = population.score.reshape(len(seeds), len(networks))
+    frames = population.framesAlive().reshape(len(seeds), len(networks))
+    return {"cell": index,
+            "seconds": time.perf_counter() - start,
+            "models": [{"mean_pipes": float(pipes[:, column].mean()),
+                        "min_pipes": int(pipes[:, column].min()),
+                        "completed": int((pipes[:, column] >= max_pipes).sum()),
+                        "mean_frames_alive": float(frames[:, column].mean())}
+                       for column in range(len(networks))]}
+
+
+def printMatrix(keys, cells, results, model_paths, courses, file=sys.stdout):
+    # one row per combination of settings, the mean pipes passed and the courses completed of every model
+    header = keys + [os.path.splitext(os.path.basename(path))[0] for path in model_paths]
+    rows = []
+    for cell, result in zip(cells, results):
+        values = [f"{cell[key]:g}" for key in keys]
+        if "error" in result:
+            values += ["invalid"] * len(model_paths)
+        else:
+            values += [f"{scores['mean_pipes']:.1f} ({scores['completed']}/{courses})" for scores in result["models"]]
+        rows.append(values)
+
+    widths = [max(len(row[column]) for row in [header] + rows) for column in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)), file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play saved models headless on seeded courses for every combination "
+                                                 "of game settings and print the pipes they pass")
+    parser.add_argument("models", nargs="+", help="model files (.npz, convert pickled genomes with model.py)")
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2,...",
+                        help="values of a game-config.cfg setting, every combination of the grid keys is played")
+    parser.add_argument("--courses", type=int, default=20, help="seeded courses every model plays per combination")
+    parser.add_argument("--max-pipes", type=int, default=200,
+                        help="pipes after which a course counts as completed and ends")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of processes playing combinations at once (one per CPU if not given)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first course")
+    parser.add_argument("--output", default="robustness-results.json", help="file the results are written to as JSON")
+    args = parser.parse_args()
+    if args.courses < 1 or args.max_pipes < 1:
+        parser.error("--courses and --max-pipes must be at least 1")
+    if args.max_pipes > simulation.max_score:
+        # a bird passing max_score force quits its course for the other models too
+        parser.error(f"--max-pipes can be at most {simulation.max_score}")
+
+    base_settings = loadSettings()
+    try:
+        grid = dict(parseValues(spec) for spec in args.grid)
+        for model_path in args.models:
+            model.Model(model_path)
+    except (ValueError, OSError) as error:
+        parser.error(str(error))
+    unknown = [key for key in grid if key not in base_settings]
+    if unknown:
+        parser.error(f"{', '.join(unknown)} not in game-config.cfg, settings are {', '.join(base_settings)}")
+
+    cells = createGrid(base_settings, grid)
+    seeds = list(range(args.seed, args.seed + args.courses))
+    tasks = [(index, cell, args.models, seeds, args.max_pipes) for index, cell in enumerate(cells)]
+    print(f"{len(args.models)} models, {len(cells)} combinations of settings, {args.courses} courses each "
+          f"on {args.workers} processes", file=sys.stderr)
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        results = pool.map(evaluateSettings, tasks)
+    printMatrix(list(grid), cells, results, args.models, args.courses)
+
+    with open(args.output, "w") as file:
+        json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "seconds": time.perf_counter() - start,
+                   "models": args.models,
+                   "seeds": seeds,
+                   "max_pipes": args.max_pipes,
+                   "results": [{"settings": cell, **result} for cell, result in zip(cells, results)]}, file, indent=2)
+    print(f"results written to {args.output}", file=sys.stderr)
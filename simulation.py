@@ -0,0 +1,306 @@
+import numpy as np
+import neat
+from course import screen_width, screen_height, pipe_width, pipe_height, roundCoordinate, getCourse, Courses
+from networks import BatchedNetworks
+from collision import shrinkRect, getHitboxes, collideHitbox, collideHitboxes
+
+# size of the bird images in extras/
+player_width, player_height = 34, 24
+
+# a generation is force quit once a bird passes this many pipes
+max_score = 1500
+
+# once this few birds are alive the rest of a generation is played bird by bird (see simulateBirds),
+# array operations cost about as much for a single bird as for thousands
+scalar_birds = 8
+
+
+class Population:
+    # state of every bird of a generation held in arrays (structure of arrays)
+
+    def __init__(self, size, settings, course_index=None):
+        self.FPS = settings["FPS"]
+        self.g = settings["g"]
+        self.speed_on_press = -settings["player_speed"]
+
+        self.x = roundCoordinate(screen_width / 3) - player_width // 2  # left edge, shared by all birds
+        self.hitbox = shrinkRect(self.x, 0, player_width, player_height)
+        self.y = np.full(size, screen_height / 2)  # unclamped height fed to the neural networks
+        self.top = np.full(size, roundCoordinate(screen_height / 2) - player_height // 2)
+        self.speed = np.zeros(size)
+        self.time_since_press = np.zeros(size)
+        self.time_of_press = np.zeros(size, dtype=np.int64)  # in frames
+        self.alive = np.ones(size, dtype=bool)
+        self.score = np.zeros(size, dtype=np.int64)
+        self.fitness = np.zeros(size)
+        self.death_frame = np.zeros(size, dtype=np.int64)  # frame a bird collided in (or was stopped in)
+        self.frame_count = 0
+
+        # course every bird plays (all play the same one unless it is a course.Courses)
+        # and the frame a bird passing max_score force quit each course in (0 if none did)
+        self.course_index = np.zeros(size, dtype=np.int64) if course_index is None else course_index
+        self.quit_frames = np.zeros(int(self.course_index.max(initial=0)) + 1, dtype=np.int64)
+        self.next_pipe = 0  # first pipe pair of the course not yet passed
+
+    def runMotionEngine(self, index):
+        time_since_press = self.time_since_press[index]
+        self.speed[index] = self.speed_on_press + self.g * time_since_press
+        self.y[index] += self.speed_on_press * time_since_press + 0.5 * self.g * time_since_press ** 2
+
+    def getNetworkInputs(self, index, course):
+        # 1) y coordinate of player
+        # 2) horizontal distance from nearest pipe
+        # 3) vertical distance from top pipe
+        # 4) vertical distance from bottom pipe
+        top_pipe, bottom_pipe = course.pipeRects(self.next_pipe, self.frame_count, index)
+        centery = self.top[index] + player_height // 2
+
+        inputs = np.empty((len(index), 4))
+        inputs[:, 0] = self.y[index] / 200
+        inputs[:, 1] = abs(self.x + player_width // 2 - (top_pipe[0] + pipe_width // 2)) / 100
+        inputs[:, 2] = np.abs(centery - (top_pipe[1] + pipe_height)) / 100
+        inputs[:, 3] = np.abs(centery - bottom_pipe[1]) / 100
+        return inputs
+
+    def movePlayers(self, index, flaps):
+        # rects truncate moves to whole pixels
+        self.top[index] += np.where(flaps, int(self.speed_on_press), np.trunc(self.speed[index]).astype(np.int64))
+
+        self.time_of_press[index[flaps]] = self.frame_count
+        self.time_since_press[index] = np.where(flaps, 0.0, (self.frame_count - self.time_of_press[index]) / self.FPS)
+
+        # prevent players from going off screen
+        np.maximum(self.top, 0, out=self.top)
+        np.minimum(self.top, screen_height - player_height, out=self.top)
+
+    def checkCollision(self, index, course):
+        x, offset, width, height = self.hitbox
+        hitboxes = getHitboxes(course, self.next_pipe, self.frame_count, self.x + player_width, index)
+        collided = collideHitboxes(x, width, self.top[index] + offset, height, hitboxes)
+
+        # penalize for collision
+        self.fitness[index[collided]] -= 1
+        self.alive[index[collided]] = False
+        self.death_frame[index[collided]] = self.frame_count
+
+    def framesAlive(self):
+        # frames every bird was rewarded for surviving
+        return np.where(self.alive, self.frame_count, self.death_frame)
+
+    def stopCourses(self, max_frames=None):
+        # force quits the courses a living bird passed max_score on and stops the courses that reached
+        # max_frames (a number or one per course), their birds stop without a penalty.
+        # Returns whether any bird is still playing
+        passed = np.zeros(len(self.quit_frames), dtype=bool)
+        passed[self.course_index[self.alive & (self.score > max_score)]] = True
+        self.quit_frames[passed] = self.frame_count
+
+        if max_frames is not None:
+            passed |= self.frame_count >= np.asarray(max_frames)
+        stopped = self.alive & passed[self.course_index]
+        self.death_frame[stopped] = self.frame_count
+        self.alive[stopped] = False
+        return bool(self.alive.any())
+
+    def calculateScore(self, course):
+        next_pipe = course.passedPipes(self.frame_count, self.x)
+        if next_pipe > self.next_pipe:
+            self.score[self.alive] += 1
+            self.fitness[self.alive] += 5  # reward for going through pipe
+            self.next_pipe = next_pipe
+
+
+class FlapRecorder:
+    # flap decisions of every bird of a generation, one packed row of bits per frame
+
+    def __init__(self, size):
+        self.size = size
+        self.rows = []
+
+    def record(self, index, flaps):
+        # flaps decided by the living birds in index in this frame
+        row = np.zeros(self.size, dtype=bool)
+        row[index] = flaps
+        self.rows.append(np.packbits(row))
+
+    def birdFlaps(self, frames_alive):
+        # the decisions of every bird in the frames it was alive (a bird's decisions after it died are
+        # all False and are dropped)
+        if not self.rows:
+            return [np.zeros(0, dtype=bool) for _ in range(self.size)]
+        flaps = np.unpackbits(np.stack(self.rows), axis=1, count=self.size).astype(bool)
+        return [flaps[:frames, bird] for bird, frames in enumerate(frames_alive)]
+
+
+def simulateFrame(population, course, decide, recorder=None, max_frames=None):
+    # runs the same frame as train-ai.py's gameloop and returns whether the generation goes on,
+    # decide(index, inputs) returns the network outputs of the living birds in index
+    population.frame_count += 1
+    population.calculateScore(course)
+
+    index = np.flatnonzero(population.alive)
+    if len(index) == 0:
+        return False
+
+    population.runMotionEngine(index)
+
+    # reward for surviving (3 for each second)
+    population.fitness[index] += 3 / population.FPS
+
+    flaps = decide(index, population.getNetworkInputs(index, course)) > 0.5
+    if recorder is not None:
+        recorder.record(index, flaps)
+    population.movePlayers(index, flaps)
+    population.checkCollision(index, course)
+
+    # force quit if AI passes max_score points
+    return population.stopCourses(max_frames)
+
+
+def simulateBirds(population, course, decide_bird, max_frames=None, recorder=None):
+    # plays the rest of a generation with the state of the living birds in Python scalars, every frame the
+    # same as simulateFrame. decide_bird(bird, inputs) returns the network output of one bird for a tuple
+    # of inputs. Every bird of a course.Courses plays its own course.Course (they share pipe frames and land)
+    courses = course.courses if isinstance(course, Courses) else [course]
+    course_index = population.course_index.tolist()
+    if max_frames is not None:
+        max_frames = np.broadcast_to(max_frames, len(population.quit_frames)).tolist()
+
+    birds = np.flatnonzero(population.alive).tolist()
+    y, top, speed = population.y.tolist(), population.top.tolist(), population.speed.tolist()
+    time_since_press, time_of_press = population.time_since_press.tolist(), population.time_of_press.tolist()
+    score, fitness = population.score.tolist(), population.fitness.tolist()
+    death_frame = population.death_frame.tolist()
+
+    x, offset, width, height = population.hitbox
+    g, speed_on_press, FPS = population.g, population.speed_on_press, population.FPS
+    while birds:
+        population.frame_count += 1
+        frame = population.frame_count
+
+        # reward for going through pipe
+        next_pipe = course.passedPipes(frame, population.x)
+        if next_pipe > population.next_pipe:
+            for bird in birds:
+                score[bird] += 1
+                fitness[bird] += 5
+            population.next_pipe = next_pipe
+
+        # network inputs of the next pipe pair and hitboxes of the courses the birds play
+        obstacles = {}
+        for index in {course_index[bird] for bird in birds}:
+            top_pipe, bottom_pipe = courses[index].pipeRects(population.next_pipe, frame)
+            obstacles[index] = (abs(population.x + player_width // 2 - (top_pipe[0] + pipe_width // 2)) / 100,
+                                top_pipe[1] + pipe_height, bottom_pipe[1],
+                                getHitboxes(courses[index], population.next_pipe, frame, population.x + player_width))
+
+        flaps = []
+        collided = set()
+        for bird in birds:
+            seconds = time_since_press[bird]
+            speed[bird] = speed_on_press + g * seconds
+            y[bird] += speed_on_press * seconds + 0.5 * g * seconds ** 2
+
+            # reward for surviving (3 for each second)
+            fitness[bird] += 3 / FPS
+
+            distance, pipe_bottom, pipe_top, hitboxes = obstacles[course_index[bird]]
+            centery = top[bird] + player_height // 2
+            flap = decide_bird(bird, (y[bird] / 200, distance, abs(centery - pipe_bottom) / 100,
+                                      abs(centery - pipe_top) / 100)) > 0.5
+            flaps.append(flap)
+
+            # rects truncate moves to whole pixels
+            if flap:
+                top[bird] += int(speed_on_press)
+                time_of_press[bird] = frame
+                time_since_press[bird] = 0.0
+            else:
+                top[bird] += int(speed[bird])
+                time_since_press[bird] = (frame - time_of_press[bird]) / FPS
+            top[bird] = min(max(top[bird], 0), screen_height - player_height)
+
+            # penalize for collision
+            if collideHitbox((x, top[bird] + offset, width, height), hitboxes):
+                fitness[bird] -= 1
+                death_frame[bird] = frame
+                collided.add(bird)
+
+        if recorder is not None:
+            recorder.record(birds, flaps)
+        birds = [bird for bird in birds if bird not in collided]
+
+        # force quit if AI passes max_score points (see Population.stopCourses)
+        passed = {course_index[bird] for bird in birds if score[bird] > max_score}
+        population.quit_frames[list(passed)] = frame
+        if max_frames is not None:
+            passed.update(index for index, frames in enumerate(max_frames) if frame >= frames)
+        for bird in birds:
+            if course_index[bird] in passed:
+                death_frame[bird] = frame
+        birds = [bird for bird in birds if course_index[bird] not in passed]
+
+    population.y[:], population.top[:], population.speed[:] = y, top, speed
+    population.time_since_press[:], population.time_of_press[:] = time_since_press, time_of_press
+    population.score[:], population.fitness[:], population.death_frame[:] = score, fitness, death_frame
+    population.alive[:] = False
+
+
+def simulate(population, course, decide, max_frames=None, recorder=None, decide_bird=None):
+    # runs frames until every bird dies (or max_frames are simulated), the last scalar_birds birds
+    # are played by simulateBirds if decide_bird is given
+    while simulateFrame(population, course, decide, recorder, max_frames):
+        if decide_bird is not None and np.count_nonzero(population.alive) <= scalar_birds:
+            simulateBirds(population, course, decide_bird, max_frames, recorder)
+            break
+
+
+def createCourses(settings, seed, size):
+    # the course of seed for size birds, or for a list of seeds every bird on every course
+    # (bird k * size + b plays course k), and the course every bird plays
+    if isinstance(seed, (list, tuple)):
+        course_index = np.repeat(np.arange(len(seed)), size)
+        return Courses([getCourse(settings, course_seed) for course_seed in seed], course_index), course_index
+    return getCourse(settings, seed), np.zeros(size, dtype=np.int64)
+
+
+def simulateGenomes(genomes, config, settings, seed=None, max_frames=None, recorder=None):
+    # seed can be a list of seeds to play every genome on every course in one batch
+    # (see createCourses, max_frames can then be one per course)
+    networks = [neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes]
+    neural_networks = BatchedNetworks(networks)
+    course, course_index = createCourses(settings, seed, len(genomes))
+
+    def decide(index, inputs):
+        return neural_networks.activate(inputs, index % len(genomes))[:, 0]
+
+    def decideBird(bird, inputs):
+        return networks[bird % len(genomes)].activate(inputs)[0]
+
+    population = Population(len(course_index), settings, course_index)
+    simulate(population, course, decide, max_frames, recorder, decideBird)
+    return population
+
+
+def combineResults(fitness, frames_alive, scores, size, combine="mean"):
+    # results of size genomes from birds that played them on one or more courses, the fitness of a genome
+    # is its mean or its minimum fitness on the courses, frames alive and pipes passed are means
+    if len(fitness) == size:
+        return fitness, frames_alive, scores
+    combine = np.mean if combine == "mean" else np.min
+    return (combine(fitness.reshape(-1, size), axis=0), frames_alive.reshape(-1, size).mean(axis=0),
+            scores.reshape(-1, size).mean(axis=0))
+
+
+def setResults(genomes, fitness, frames_alive, scores):
+    # the fitness of every genome, with the frames it survived and the pipes it passed for the metrics
+    for (_, genome), value, frames, score in zip(genomes, fitness, frames_alive, scores):
+        genome.fitness = float(value)
+        genome.frames_alive = frames.item()  # means (floats) on several courses
+        genome.pipes_passed = score.item()
+
+
+def evaluateGenomes(genomes, config, settings, seed=None, recorder=None, combine="mean"):
+    population = simulateGenomes(genomes, config, settings, seed, recorder=recorder)
+    setResults(genomes, *combineResults(population.fitness, population.framesAlive(), population.score,
+                                        len(genomes), combine))
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+
+# how a process gets to its first frame:
+#   window   - game.py and rendered training: mixer, music, window and every asset
+#   fast     - the fast startup of batch jobs: SDL dummy video driver, no mixer, only the assets that are drawn
+#   headless - train-ai.py --headless and the evaluation workers: the simulation, without pygame
+profiles = ("window", "fast", "headless")
+
+
+def drawFirstFrame(fast):
+    # imports are timed as part of the startup
+    import assets
+    import engine
+    from course import loadSettings
+    from renderer import Renderer
+
+    screen = engine.initializeGame(fast)
+    images = assets.loadAssets(assets.game_assets if fast else None)
+    renderer = Renderer(screen, images["background"])
+    game = engine.Game(loadSettings(), images, seed=0, fixed_timestep=True)
+    game.createPlayer(images["player"])
+    game.draw(renderer)
+    renderer.update()
+
+
+def simulateFirstFrame():
+    import random
+    import neat
+    import simulation
+    from course import loadSettings
+
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                neat.DefaultSpeciesSet, neat.DefaultStagnation, "neat-config.cfg")
+    random.seed(0)
+    genomes = list(neat.Population(config).population.items())
+    simulation.simulateGenomes(genomes, config, loadSettings(), 0, max_frames=1)
+
+
+def measureStartup(profile):
+    # seconds from starting a new interpreter to the end of its first frame (interpreter startup and
+    # imports included), the child reports the moment it finished the frame
+    start = time.time()
+    child = subprocess.run([sys.executable, __file__, "--child", profile], capture_output=True, text=True)
+    lines = [line for line in child.stdout.splitlines() if line.startswith("first frame ")]
+    if child.returncode != 0 or not lines:
+        error = child.stderr.strip().splitlines()
+        return {"error": error[-1] if error else f"exit code {child.returncode}"}
+    return {"seconds": float(lines[-1].split()[-1]) - start}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the time from starting a process to its first frame "
+                                                 "for the startup profiles of the game")
+    parser.add_argument("--profiles", nargs="+", choices=profiles, default=list(profiles),
+                        help="startup profiles to measure")
+    parser.add_argument("--repeats", type=int, default=5, help="processes started per profile")
+    parser.add_argument("--output", default="startup-results.json", help="file the results are written to as JSON")
+    parser.add_argument("--child", choices=profiles, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        if args.child == "headless":
+            simulateFirstFrame()
+        else:
+            drawFirstFrame(args.child == "fast")
+        print(f"first frame {time.time()!r}", flush=True)
+        sys.exit()
+
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    results = []
+    for profile in args.profiles:
+        runs = [measureStartup(profile) for _ in range(args.repeats)]
+        seconds = [run["seconds"] for run in runs if "seconds" in run]
+        errors = [run["error"] for run in runs if "error" in run]
+        result = {"profile": profile, "runs": runs}
+        if seconds:
+            result.update(median_seconds=statistics.median(seconds), min_seconds=min(seconds))
+            print(f"{profile:8s}  {1000 * result['median_seconds']:8.1f} ms median  "
+                  f"{1000 * result['min_seconds']:8.1f} ms min  ({len(seconds)} runs)", file=sys.stderr)
+        if errors:
+            print(f"{profile:8s}  {len(errors)} runs failed: {errors[-1]}", file=sys.stderr)
+        results.append(result)
+
+    with open(args.output, "w") as file:
+        json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "environment": {key: os.environ.get(key) for key in ("SDL_VIDEODRIVER", "SDL_AUDIODRIVER")},
+                   "results": results}, file, indent=2)
+    print(f"results written to {args.output}", file=sys.stderr)
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import statistics
+import configparser
+import tempfile
+import multiprocessing
+import neat
+import simulation
+from course import getCourse, loadSettings
+
+
+def findSections(config_path):
+    # the section of every key of the NEAT configuration file
+    parser = configparser.RawConfigParser()
+    parser.read(config_path)
+    return {key: section for section in parser.sections() for key in parser[section]}
+
+
+def parseValues(spec):
+    # "key=v1,v2,..." as the key and its values
+    key, separator, values = spec.partition("=")
+    if not separator or not values:
+        raise ValueError(f"{spec} is not key=value,value,...")
+    return key.strip(), [value.strip() for value in values.split(",")]
+
+
+def parseRange(spec):
+    # "key=low:high" as the key and a function drawing a value from the range with a random.Random
+    # (integers if both bounds are integers)
+    key, separator, bounds = spec.partition("=")
+    low, colon, high = bounds.partition(":")
+    if not separator or not colon:
+        raise ValueError(f"{spec} is not key=low:high")
+    if low.strip().lstrip("-").isdigit() and high.strip().lstrip("-").isdigit():
+        low, high = int(low), int(high)
+        return key.strip(), lambda generator: generator.randint(low, high)
+    low, high = float(low), float(high)
+    return key.strip(), lambda generator: round(generator.uniform(low, high), 4)
+
+
+def createConfigurations(grid, ranges, samples, seed):
+    # every combination of the grid values, each with samples random draws of the ranges if any are given
+    keys = list(grid)
+    combinations = [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    if not ranges:
+        return combinations
+    generator = random.Random(seed)
+    return [{**combination, **{key: draw(generator) for key, draw in ranges.items()}}
+            for combination in combinations for _ in range(samples)]
+
+
+def loadConfig(config_path, overrides, sections):
+    # the NEAT configuration of the file with some of its keys changed
+    parser = configparser.RawConfigParser()
+    parser.read(config_path)
+    for key, value in overrides.items():
+        parser.set(sections[key], key, str(value))
+
+    with tempfile.NamedTemporaryFile("w", suffix=".cfg", delete=False) as file:
+        parser.write(file)
+    try:
+        return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                  neat.DefaultSpeciesSet, neat.DefaultStagnation, file.name)
+    finally:
+        os.remove(file.name)
+
+
+def runTrial(task):
+    # trains a population headless until a genome passes target pipes or max_generations are evaluated,
+    # generation g plays the course of seed + g like train-ai.py --seed. Generations end once a bird
+    # passes target pipes, so a genome that learned the game does not play up to simulation.max_score
+    index, overrides, seed, config_path, sections, settings, target, max_generations = task
+    config = loadConfig(config_path, overrides, sections)
+    random.seed(seed)
+    population = neat.Population(config)
+    best = {"score": 0, "fitness": None}
+    bird_x = simulation.Population(0, settings).x
+
+    def evaluate(genomes, config):
+        course_seed = seed + population.generation
+        max_frames = getCourse(settings, course_seed).passingFrame(target, bird_x)
+        birds = simulation.simulateGenomes(genomes, config, settings, course_seed, max_frames)
+        simulation.setResults(genomes, birds.fitness, birds.framesAlive(), birds.score)
+        best["score"] = max(best["score"], int(birds.score.max()))
+        fitness = float(birds.fitness.max())
+        best["fitness"] = fitness if best["fitness"] is None else max(best["fitness"], fitness)
+
+    start = time.perf_counter()
+    generations = None
+    extinct = False
+    for generation in range(max_generations):
+        try:
+            population.run(evaluate, 1)
+        except neat.CompleteExtinctionException:
+            extinct = True
+            break
+        if best["score"] >= target:
+            generations = generation + 1
+            break
+
+    return {"configuration": index,
+            "seed": seed,
+            "generations": generations,
+            "seconds": time.perf_counter() - start,
+            "best_score": best["score"],
+            "best_fitness": best["fitness"],
+            "extinct": extinct}
+
+
+def summarizeRuns(configuration, runs):
+    # generations to target of the runs that reached it, the mean wall time of every run
+    reached = [run["generations"] for run in runs if run["generations"] is not None]
+    return {"overrides": configuration,
+            "runs": len(runs),
+            "reached": len(reached),
+            "median_generations": statistics.median(reached) if reached else None,
+            "mean_generations": statistics.mean(reached) if reached else None,
+            "mean_seconds": statistics.mean(run["seconds"] for run in runs),
+            "best_score": max(run["best_score"] for run in runs)}
+
+
+def printTable(keys, results, file=sys.stdout):
+    # one row per configuration, the ones that reached the target most often and fastest first
+    header = keys + ["reached", "median gens", "mean gens", "mean s", "best score"]
+    rows = []
+    for result in results:
+        generations = [result["median_generations"], result["mean_generations"]]
+        rows.append([str(result["overrides"][key]) for key in keys] +
+                    [f"{result['reached']}/{result['runs']}"] +
+                    ["-" if value is None else f"{value:g}" for value in generations] +
+                    [f"{result['mean_seconds']:.1f}", str(result["best_score"])])
+
+    widths = [max(len(row[column]) for row in [header] + rows) for column in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)), file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train with several neat-config.cfg settings headless in parallel "
+                                                 "and compare the generations they take to reach a score")
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2,...",
+                        help="values of a neat-config.cfg key, every combination of the grid keys is trained")
+    parser.add_argument("--random", action="append", default=[], metavar="KEY=LOW:HIGH",
+                        help="range a neat-config.cfg key is drawn from (integers if both bounds are integers)")
+    parser.add_argument("--samples", type=int, default=10,
+                        help="random draws of the --random keys (for every combination of the grid keys)")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="training runs of every configuration, each on other courses and NEAT seeds")
+    parser.add_argument("--target", type=int, default=100, help="pipes a genome has to pass")
+    parser.add_argument("--generations", type=int, default=50,
+                        help="generations a run gets to reach the target")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of processes training at once (one per CPU if not given)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first run of every configuration and of the random draws")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(__file__), "neat-config.cfg"),
+                        help="NEAT configuration the swept keys are changed in")
+    parser.add_argument("--output", default="sweep-results.json", help="file the results are written to as JSON")
+    args = parser.parse_args()
+    if not args.grid and not args.random:
+        parser.error("give at least one --grid or --random key")
+    if args.samples < 1 or args.repeats < 1 or args.target < 1 or args.generations < 1:
+        parser.error("--samples, --repeats, --target and --generations must be at least 1")
+
+    sections = findSections(args.config)
+    try:
+        grid = dict(parseValues(spec) for spec in args.grid)
+        ranges = dict(parseRange(spec) for spec in args.random)
+    except ValueError as error:
+        parser.error(str(error))
+    unknown = [key for key in list(grid) + list(ranges) if key not in sections]
+    if unknown:
+        parser.error(f"{', '.join(unknown)} not in {args.config}")
+
+    configurations = createConfigurations(grid, ranges, args.samples, args.seed)
+    settings = loadSettings()
+    # every configuration is trained on the same seeds, runs do not share courses
+    seeds = [args.seed + repeat * args.generations for repeat in range(args.repeats)]
+    tasks = [(index, configuration, seed, args.config, sections, settings, args.target, args.generations)
+             for index, configuration in enumerate(configurations) for seed in seeds]
+    print(f"{len(configurations)} configurations, {len(tasks)} runs on {args.workers} processes", file=sys.stderr)
+
+    start = time.perf_counter()
+    runs = []
+    with multiprocessing.Pool(args.workers) as pool:
+        for run in pool.imap_unordered(runTrial, tasks):
+            runs.append(run)
+            reached = f"{run['generations']} generations" if run["generations"] is not None else "not reached"
+            print(f"[{len(runs)}/{len(tasks)}] {configurations[run['configuration']]} seed {run['seed']}: "
+                  f"{reached}, {run['seconds']:.1f} s", file=sys.stderr)
+
+    results = [summarizeRuns(configuration, [run for run in runs if run["configuration"] == index])
+               for index, configuration in enumerate(configurations)]
+    results.sort(key=lambda result: (-result["reached"], result["median_generations"] or 0, result["mean_seconds"]))
+    printTable(list(grid) + list(ranges), results)
+
+    with open(args.output, "w") as file:
+        json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "seconds": time.perf_counter() - start,
+                   "target": args.target,
+                   "max_generations": args.generations,
+                   "seeds": seeds,
+                   "settings": settings,
+                   "results": results,
+                   "runs": sorted(runs, key=lambda run: (run["configuration"], run["seed"]))}, file, indent=2)
+    print(f"results written to {args.output}", file=sys.stderr)
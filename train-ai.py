@@ -1,217 +1,86 @@
 import pygame
 import random
-import collections
 import os
+import sys
+import signal
 import neat
 import pickle
-import configparser
-
-configParser = configparser.RawConfigParser()
-configParser.read("game-config.cfg")
-
-clock = pygame.time.Clock()
-FPS = configParser.getint("game settings", "FPS")
-screen_width = 800
-screen_height = 600
-land_thickness = 80
-
-# global variables
-g = configParser.getfloat("game settings", "g")
-player_speed = configParser.getfloat("game settings", "player_speed")
-horizontal_speed = configParser.getfloat("game settings", "horizontal_speed")
-distance_between_pipes = configParser.getfloat("game settings", "distance_between_pipes")
-horizontal_distance_between_pipes = screen_width / configParser.getfloat("game settings", "horizontal_distance_between_pipes")
-min_pipe_height = configParser.getfloat("game settings", "min_pipe_height")
-score = 0
-
-# sprites and sprite groups
-obstacles = pygame.sprite.LayeredUpdates()
-surfaces = []
-players = []
-pipes = collections.deque()
-passed_pipes = collections.deque()
+import argparse
+import assets
+import engine
+from hud import Hud
+from renderer import Renderer
+from profiler import FrameProfiler, ProfilerOverlay, game_phases, addProfilerArguments, createProfiler
+import simulation
+import parallel
+import cluster
+import checkpoint
+import metrics
+import replay
+import model
+from course import loadSettings
+
+settings = None           # game settings of game-config.cfg (loaded when training starts)
 
 # global variables for NEAT
-number_of_players = 20    # number of genomes in a population
-neural_networks = []      # list of neural networks for each genome
 generation = 0            # current generation number
 
-
-class Player(pygame.sprite.Sprite):
-
-    def __init__(self, x_coordinate, y_coordinate, speed, player_images):
-        super(Player, self).__init__()
-        self._layer = 0
-        self.score = 0
-        self.x_coordinate = x_coordinate
-        self.y_coordinate = y_coordinate
-        self.speed_on_press = -speed
-        self.speed = 0
-        self.time_since_press = 0
-        self.time_of_press = pygame.time.get_ticks()  # start time
-        self.pressed = False
-        self.is_alive = True
-
-        self.animation_time = FPS / 3     # 3 animations every second
-        self.animation_frame_count = 0    # counts number of frames passed
-
-        self.images = player_images
-        self.surface = self.images[2]
-        self.rect = self.surface.get_rect(center=(self.x_coordinate, self.y_coordinate))
-
-    def runMotionEngine(self):
-        self.speed = self.speed_on_press + g * self.time_since_press
-        self.y_coordinate += self.speed_on_press * self.time_since_press + 0.5 * g * self.time_since_press ** 2
-
-    def movePlayerOnScreen(self, output):
-
-        # movement of player based on output of neural network
-        if output > 0.5:
-            self.rect.move_ip(0, self.speed_on_press)
-            self.time_since_press = 0
-            self.time_of_press = pygame.time.get_ticks()
-            # self.pressed = True
-
-        else:
-            self.rect.move_ip(0, self.speed)
-            self.time_since_press = (pygame.time.get_ticks() - self.time_of_press) / 1000
-            # if not output > 0.5:
-            #     self.pressed = False
-
-        self.animatePlayer()
-
-        # prevent player from going off screen
-        if self.rect.top < 0:
-            self.rect.top = 0
-        if self.rect.bottom > screen_height:
-            self.rect.bottom = screen_height
-
-    def animatePlayer(self):
-        self.animation_frame_count += 1
-        if self.animation_frame_count < self.animation_time / 4:
-            self.surface = self.images[0]
-        elif self.animation_frame_count < 2 * self.animation_time / 4:
-            self.surface = self.images[1]
-        elif self.animation_frame_count < 3 * self.animation_time / 4:
-            self.surface = self.images[2]
-        elif self.animation_frame_count < self.animation_time:
-            self.surface = self.images[1]
-        else:
-            self.animation_frame_count = 0
-
-
-class Land(pygame.sprite.Sprite):
-    def __init__(self, position, land_image):
-        super(Land, self).__init__()
-        self._layer = 2
-        self.position = position
-        self.surface = land_image
-
-        if self.position == "top":
-            self.surface = pygame.transform.flip(self.surface, False, True)
-            self.rect = self.surface.get_rect(center=(screen_width, land_thickness / 2))
-        if self.position == "bottom":
-            self.rect = self.surface.get_rect(center=(screen_width, screen_height - land_thickness / 2))
-
-    def moveHorizontal(self):
-        self.rect.move_ip(-horizontal_speed, 0)
-
-
-class Pipes(pygame.sprite.Sprite):
-    def __init__(self, position, top_coordinate, pipe_image):
-        super(Pipes, self).__init__()
-        self._layer = 1
-        self.position = position
-        self.surface = pipe_image
-
-        if self.position == "top":
-            self.top_coordinate = top_coordinate
-            self.surface = pygame.transform.flip(self.surface, False, True)
-            self.rect = self.surface.get_rect(bottomleft=(screen_width, self.top_coordinate))
-        if self.position == "bottom":
-            self.top_coordinate = top_coordinate + distance_between_pipes
-            self.rect = self.surface.get_rect(topleft=(screen_width, self.top_coordinate))
-
-    def moveHorizontal(self):
-        self.rect.move_ip(-horizontal_speed, 0)
-
-
-def displayInfo(screen, font):
-    text_surface = font.render(f"Score: {max([player.score for player in players])}", False, (0, 0, 0))
-    screen.blit(text_surface, (5, 5))
-
-    text_surface = font.render(f"Generation: {generation}", False, (0, 0, 0))
-    screen.blit(text_surface, (screen_width - 190, 5))
-
-    text_surface = font.render(f"Alive: {sum(map(lambda player: player.is_alive, players))}", False, (0, 0, 0))
-    screen.blit(text_surface, (screen_width - 190, 30))
-
-
-def displaySprites(screen, background):
-    screen.blit(background, (0, 0))
-    for obstacle in obstacles:
-        screen.blit(obstacle.surface, obstacle.rect)
-    displayPlayers(screen)
-
-
-def displayPlayers(screen):
-    for player in players:
-        if player.is_alive:
-            rotated_image = pygame.transform.rotate(player.surface, (-25 if player.speed > 0 else 25))
-            new_rect = rotated_image.get_rect(center=player.surface.get_rect(topleft=player.rect.topleft).center)
-            screen.blit(rotated_image, new_rect)
+# global variables for headless training
+HEADLESS = False          # simulate without display, mixer and frame cap
+seed = None               # seed for the pipe course and NEAT (random if None)
+game = None               # sprites of the generation played last, time is counted in frames
+hud = None                # score, generation and alive labels, shared by every generation
+evaluator = None          # process pool or cluster for headless evaluation (None to evaluate in this process)
+courses = 1               # courses every genome of a generation plays (more than 1 are simulated headless)
+combine = "mean"          # fitness of a genome on several courses, "mean" or "min" of its fitness on each
+
+# global variables for watching the training
+render_every = 1          # draw every k-th frame of a rendered generation (uncapped if more than 1)
+render_generations = 1    # render every n-th generation, the others are simulated headless
+render_best = False       # simulate rendered generations headless too and then show their best genome
+frame_cap = True          # cap generations that draw every frame at FPS (benchmark.py turns it off)
+fast_startup = False      # draw rendered generations off-screen without sound or frame cap (engine.initializeGame)
+
+# global variables for profiling
+profiler = FrameProfiler(game_phases, enabled=False)  # times the phases of the frames of rendered generations
+profile_overlay = False   # draw the mean time of every phase over the game
+overlay = None
+
+# global variables for checkpoints
+checkpointer = None       # saves the progress of the training run to its directory in checkpoints/
+checkpoint_every = 10     # generations between checkpoints
+checkpoint_minutes = 15   # minutes between checkpoints
+resume = None             # checkpoint to continue training from
+metrics_path = None       # one line of metrics is appended to it every generation (None for the run's directory)
+record_directory = None   # every generation is recorded to a replay file in it (not recorded if None)
+
+
+def displayInfo(screen):
+    rects = hud.draw(screen)
+    if overlay is not None:
+        rects += overlay.draw(screen)
+    return rects
 
 
 def createPlayers(genomes, config, player_images):
+    neural_networks = []
     for _, genome in genomes:
         # set initial fitness of genomes to 0
         genome.fitness = 0
+        genome.frames_alive = 0
+        genome.pipes_passed = 0
 
         # create neural networks for each genome
         net = neat.nn.FeedForwardNetwork.create(genome, config)
         neural_networks.append(net)
 
         # create player for each genome
-        player = Player(screen_width / 3, screen_height / 2, player_speed, player_images)
-        players.append(player)
-
-
-def createSurfaces(land_image):
-    top_surface = Land("top", land_image)
-    bottom_surface = Land("bottom", land_image)
-    obstacles.add(top_surface), surfaces.append(top_surface)
-    obstacles.add(bottom_surface), surfaces.append(bottom_surface)
-
-
-def createPipes(pipe_image):
-    top_coordinate = random.randint(land_thickness + min_pipe_height,
-                                    screen_height - land_thickness - min_pipe_height - distance_between_pipes)
-    top_pipe = Pipes("top", top_coordinate, pipe_image)
-    bottom_pipe = Pipes("bottom", top_coordinate, pipe_image)
-    obstacles.add(top_pipe), pipes.append(top_pipe)
-    obstacles.add(bottom_pipe), pipes.append(bottom_pipe)
-
-
-def moveObstacles(pipe_image, land_image):
-    for obstacle in obstacles:
-        obstacle.moveHorizontal()
-
-    if screen_width - pipes[-1].rect.right > horizontal_distance_between_pipes:
-        createPipes(pipe_image)
-    if len(passed_pipes) > 0 and passed_pipes[0].rect.right < 0:
-        passed_pipes[0].kill()
-        passed_pipes[1].kill()
-        passed_pipes.popleft(), passed_pipes.popleft()
-
-    if surfaces[0].rect.right <= screen_width:
-        surfaces[0].kill()
-        surfaces[1].kill()
-        surfaces.clear()
-        createSurfaces(land_image)
+        game.createPlayer(player_images)
+    return neural_networks
 
 
 def checkCollision(genomes, player, index):
-    collided = pygame.sprite.spritecollideany(player, obstacles, collided=pygame.sprite.collide_rect_ratio(0.95))
+    collided = game.checkCollision(player)
     if collided:
 
         # penalize for collision
@@ -219,173 +88,334 @@ def checkCollision(genomes, player, index):
         # if collided == surfaces[1]:
         #     genomes[index][1].fitness -= 2
 
-        player.kill()
         player.is_alive = False
+        hud.changeValue("alive", -1)
 
     return collided
 
 
 def calculateScore(genomes):
-    if pipes[0].rect.right < players[0].rect.left:
-        for index, player in enumerate(players):
+    if game.passPipes():
+        best_score = 0
+        for index, player in enumerate(game.players):
             if player.is_alive:
                 player.score += 1
                 genomes[index][1].fitness += 5  # reward for going through pipe
+                genomes[index][1].pipes_passed += 1
+                best_score = player.score
 
-        passed_pipes.append(pipes.popleft())
-        passed_pipes.append(pipes.popleft())
+        # every bird alive passes a pipe at the same time, so they all have the best score
+        hud.setValue("score", max(hud.getValue("score"), best_score))
 
 
-def feedIntoNeuralNetwork(genomes, player, index):
+def feedIntoNeuralNetwork(genomes, neural_network, player, index):
     # reward for surviving (3 for each second)
-    genomes[index][1].fitness += 3 / FPS
+    genomes[index][1].fitness += 3 / settings["FPS"]
+    genomes[index][1].frames_alive += 1
 
     # pass input into neural network
-    # 1) y coordinate of player
-    # 2) horizontal distance from nearest pipe
-    # 3) vertical distance from top pipe
-    # 4) vertical distance from bottom pipe
-
-    output = neural_networks[index].activate(
-        (player.y_coordinate / 200,
-         abs(player.rect.centerx - pipes[0].rect.centerx) / 100,
-         abs(player.rect.centery - pipes[0].rect.bottom) / 100,
-         abs(player.rect.centery - pipes[1].rect.top) / 100))
+    output = neural_network.activate(game.getNetworkInputs(player))
 
     return output[0]
 
 
-def initializeGame():
-    obstacles.empty()
-
-    surfaces.clear()
-    pipes.clear()
-    passed_pipes.clear()
-
-    neural_networks.clear()
-    players.clear()
-
-    pygame.mixer.pre_init(44100, -16, 2, 2048)
-    pygame.mixer.init()
-    pygame.init()
-    pygame.mixer.music.load("extras/backgroundmusic.wav")
-    pygame.mixer.music.play(loops=-1)
-    pygame.font.init()
-
-    screen = pygame.display.set_mode((screen_width, screen_height))
-    background = pygame.image.load("extras/background.png")
-    background = pygame.transform.scale(background, (screen_width, screen_height))
-
-    pygame.display.set_caption("Flappy Bird")
-    icon = pygame.image.load("extras/bird2.png").convert_alpha()
-    pygame.display.set_icon(icon)
-
-    return screen, background
-
-
-def loadExtras():
-    player_images = [pygame.image.load("extras/bird1.png").convert(),
-                     pygame.image.load("extras/bird2.png").convert(),
-                     pygame.image.load("extras/bird3.png").convert()]
-    land_image = pygame.image.load("extras/base.png").convert()
-    land_image = pygame.transform.scale(land_image, (screen_width * 2, land_thickness))
-    pipe_image = pygame.image.load("extras/pipe.png").convert()
-
-    game_font = pygame.font.Font("extras/roboto-bold.ttf", 25)
-    flap_sound = pygame.mixer.Sound("extras/flapsound.wav")
-
-    images = {"player": player_images,
-              "land": land_image,
-              "pipe": pipe_image}
-
-    return images, game_font, flap_sound
-
-
 def gameloop(genomes, config):
-    screen, background = initializeGame()
-    images, font, flap_sound = loadExtras()
-
-    createPipes(images["pipe"])
-    createSurfaces(images["land"])
-    createPlayers(genomes, config, images["player"])
+    global generation
+
+    # every generation gets its own course, reproducible from the seed. Without a seed a random one is drawn
+    # here, so every worker, the shown best genome and a recording of the generation play the same course
+    course_seed = random.SystemRandom().randrange(2 ** 31) if seed is None else seed + generation
+    rendered = not HEADLESS and generation % render_generations == 0
+    if courses > 1:
+        course_seeds = [course_seed * courses + index for index in range(courses)]
+
+    recorder = None
+    if record_directory is not None:
+        recorder = simulation.FlapRecorder(len(genomes))
+
+    if courses > 1:
+        # every genome plays every course in one batch, rendered generations show the best genome
+        # on the first course
+        if evaluator is not None:
+            evaluator.evaluate(genomes, config, course_seeds, combine=combine)
+        else:
+            simulation.evaluateGenomes(genomes, config, settings, course_seeds, combine=combine)
+        if rendered:
+            showBestGenome(genomes, config, course_seeds[0])
+        generation += 1
+        return
+
+    if not rendered or render_best:
+        # simulate the whole population as arrays instead of sprites
+        if evaluator is not None:
+            flaps = evaluator.evaluate(genomes, config, course_seed, recorder is not None)
+        else:
+            simulation.evaluateGenomes(genomes, config, settings, course_seed, recorder)
+        if recorder is not None:
+            if evaluator is None:
+                flaps = recorder.birdFlaps([genome.frames_alive for _, genome in genomes])
+            saveRecording(genomes, course_seed, flaps)
+        if rendered:
+            showBestGenome(genomes, config, course_seed)
+        generation += 1
+        return
+
+    playGeneration(genomes, config, course_seed, render_every, recorder)
+    if recorder is not None:
+        saveRecording(genomes, course_seed, recorder.birdFlaps([genome.frames_alive for _, genome in genomes]))
+    # a generation ends when all players die or one is force quit, either way the next one plays the next course
+    generation += 1
+
+
+def saveRecording(genomes, course_seed, flaps):
+    path = os.path.join(record_directory, f"generation-{generation}.npz")
+    replay.saveReplay(path, genomes, settings, course_seed, flaps, generation)
+
+
+def showBestGenome(genomes, config, course_seed):
+    # the best genome of the generation plays the same course alone in real time, keeping its results
+    best = max(genomes, key=lambda genome: genome[1].fitness)
+    results = best[1].fitness, best[1].frames_alive, best[1].pipes_passed
+    playGeneration([best], config, course_seed)
+    best[1].fitness, best[1].frames_alive, best[1].pipes_passed = results
+
+
+def playGeneration(genomes, config, course_seed, draw_every=1, recorder=None):
+    # plays the genomes with sprites in the window until all players died or one passed max_score,
+    # drawing every draw_every-th frame (the frame rate is only capped when every frame is drawn).
+    # The flaps of every frame are recorded with recorder if it is given
+    global game, hud, overlay
+
+    screen = engine.initializeGame(fast_startup)
+    images = assets.loadAssets(assets.game_assets)
+    renderer = Renderer(screen, images["background"])
+
+    game = engine.Game(settings, images, course_seed, fixed_timestep=True)
+    neural_networks = createPlayers(genomes, config, images["player"])
+
+    if hud is None:
+        hud = engine.createTrainingHud(images["font"])
+    hud.setValue("score", 0)
+    hud.setValue("generation", generation)
+    hud.setValue("alive", len(game.players))
+    if profile_overlay and overlay is None:
+        overlay = ProfilerOverlay(profiler, Hud(assets.loadAssets(["small font"])["small font"]), (5, 90),
+                                  settings["FPS"])
 
     running = True
     while running:
+        game.frame_count += 1
+        profiler.startFrame()
 
         # check for events
         for event in pygame.event.get():
 
             if event.type == pygame.QUIT:
-                running = False
-                pygame.quit()
+                stopTraining()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    running = False
-                    pygame.quit()
+                    stopTraining()
+        profiler.mark("events")
 
         # display sprites
-        displaySprites(screen, background)
-        displayInfo(screen, font)
+        drawn = (game.frame_count - 1) % draw_every == 0
+        if drawn:
+            game.draw(renderer, displayInfo)
+        profiler.mark("draw")
 
         # move obstacles
-        moveObstacles(images["pipe"], images["land"])
+        game.moveObstacles()
+        profiler.mark("obstacles")
 
         # calculate scores
         calculateScore(genomes)
+        profiler.mark("score")
 
         # perform operations on each player
         alive = 0
-        for index, player in enumerate(players):
+        flaps = {}
+        for index, player in enumerate(game.players):
             if player.is_alive:
                 alive += 1
                 player.runMotionEngine()
+                profiler.mark("motion")
 
-                output = feedIntoNeuralNetwork(genomes, player, index)
-                player.movePlayerOnScreen(output)
+                output = feedIntoNeuralNetwork(genomes, neural_networks[index], player, index)
+                flaps[index] = output > 0.5
+                profiler.mark("network")
+                game.movePlayer(player, flaps[index])
+                profiler.mark("motion")
 
                 checkCollision(genomes, player, index)
+                profiler.mark("collision")
+
+        if recorder is not None:
+            recorder.record(list(flaps), list(flaps.values()))
 
         # quit generation once all players die
         if alive == 0:
-            global generation
-            generation += 1
             running = False
 
         # force quit if AI passes 1500 points
-        for player in players:
-            if player.is_alive and player.score > 1500:
+        for player in game.players:
+            if player.is_alive and player.score > simulation.max_score:
                 running = False
+        profiler.mark("score")
 
         # update the display
-        # print(clock.get_fps(), file=sys.stderr)
-        pygame.display.flip()
-        clock.tick(FPS)
+        if drawn:
+            renderer.update()
+        if draw_every == 1 and frame_cap:
+            engine.getClock().tick(settings["FPS"])
+        profiler.mark("display")
+        profiler.endFrame()
+
+    profiler.endGeneration(generation)
+
+
+def stopTraining(signum=None, frame=None):
+    # the window was closed or the process is terminated, the finished generations are kept in a checkpoint
+    if checkpointer is not None:
+        checkpointer.save(wait=True)
+    profiler.endGeneration(generation)  # the frames of the interrupted generation
+    pygame.quit()
+    sys.exit()
 
 
 # set up NEAT algorithm
 def runNeatAlgorithm(config_path):
+    global generation, seed, checkpointer
 
     # set up NEAT configuration from config file
     config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
                                 neat.DefaultSpeciesSet, neat.DefaultStagnation, config_path)
 
-    # create a population (generation 0)
-    population = neat.Population(config)
+    # a new run saves its checkpoints to a directory of its own in checkpoints/, a resumed run to the
+    # directory of the checkpoint it continues
+    directory = (os.path.dirname(resume) or ".") if resume is not None else checkpoint.createRunDirectory()
+    print(f"checkpoints are saved to {directory}")
+
+    # per-generation metrics streamed to metrics_path, or to a log of the run next to its checkpoints
+    path = metrics_path if metrics_path is not None else os.path.join(directory, "training-metrics.jsonl")
+    statistics = metrics.MetricsReporter(path)
+    checkpointer = checkpoint.Checkpointer(checkpoint_every, checkpoint_minutes * 60, directory, statistics)
+
+    if resume is not None:
+        # continue a run from a checkpoint (with its course seed unless another one is given)
+        population, metadata = checkpointer.restore(resume, config)
+        generation = population.generation
+        if seed is None:
+            seed = metadata["seed"]
+        # the generations after the checkpoint are played again
+        statistics.truncate(population.generation)
+    else:
+        # create a population (generation 0)
+        if seed is not None:
+            random.seed(seed)
+        population = neat.Population(config)
+    checkpointer.metadata = {"seed": seed}
 
-    # to display stats and info on screen
     population.add_reporter(neat.StdOutReporter(True))
-    population.add_reporter(neat.StatisticsReporter())
+    population.add_reporter(statistics)
+    population.add_reporter(checkpointer)
 
     # run game for 500 generations
-    winner = population.run(gameloop, 500)
+    winner = population.run(gameloop, 500 - population.generation)
+    if evaluator is not None:
+        evaluator.close()
+    checkpointer.wait()
 
-    # save the best model
+    # save the best model (as a pickled genome and as a model file for human-vs-ai.py)
     saved_model = open("models/new-model.pickle", "wb")
     pickle.dump(winner, saved_model)
     saved_model.close()
+    model.saveModel(neat.nn.FeedForwardNetwork.create(winner, config), "models/new-model.npz", winner.fitness)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch the AI learn to play Flappy Bird")
+    parser.add_argument("--headless", action="store_true",
+                        help="train without a window, sound or frame cap using a fixed timestep")
+    parser.add_argument("--seed", type=int, help="seed for the pipe courses and NEAT")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes evaluating the generations simulated headless "
+                             "(implies --headless unless --render-generations or --render-best is given)")
+    parser.add_argument("--cluster", metavar="ADDRESS",
+                        help="evaluate the generations simulated headless on workers (python cluster.py ADDRESS) "
+                             "connecting to host:port or to a Unix socket path (implies --headless like --workers)")
+    parser.add_argument("--local-workers", type=int, default=0, metavar="N",
+                        help="start N cluster workers on this machine")
+    parser.add_argument("--authkey", help=f"key the cluster workers authenticate with "
+                                          f"(read from {cluster.authkey_variable} if not given)")
+    parser.add_argument("--render-every", type=int, default=1, metavar="K",
+                        help="draw every k-th frame and run the rendered generations without a frame cap")
+    parser.add_argument("--render-generations", type=int, default=1, metavar="N",
+                        help="render every n-th generation and simulate the others headless")
+    parser.add_argument("--render-best", action="store_true",
+                        help="simulate every generation headless and show its best genome in real time")
+    parser.add_argument("--checkpoint-every", type=int, default=10, metavar="N",
+                        help="save a checkpoint to checkpoints/ every n generations")
+    parser.add_argument("--checkpoint-minutes", type=float, default=15, metavar="M",
+                        help="save a checkpoint at least every m minutes")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="CHECKPOINT",
+                        help="continue training from a checkpoint (if none is given, the latest one of the run "
+                             "in checkpoints/ that saved a checkpoint last)")
+    parser.add_argument("--courses", type=int, default=1, metavar="K",
+                        help="score every genome on K courses per generation, simulated headless in one batch")
+    parser.add_argument("--combine", choices=["mean", "min"], default="mean",
+                        help="fitness of a genome on several courses: the mean or the minimum of its fitness on each")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="file one JSON line of metrics is appended to every generation "
+                             "(training-metrics.jsonl in the run's checkpoint directory if not given)")
+    parser.add_argument("--record", metavar="DIRECTORY",
+                        help="record every generation to DIRECTORY/generation-N.npz to play it again with replay.py")
+    parser.add_argument("--fast-startup", action="store_true",
+                        help="draw rendered generations off-screen (SDL dummy video driver) without sound or "
+                             "frame cap, e.g. to profile or record the sprite loop in batch jobs")
+    addProfilerArguments(parser)
+    args = parser.parse_args()
+    if args.render_every < 1 or args.render_generations < 1:
+        parser.error("--render-every and --render-generations must be at least 1")
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1")
+    if args.courses < 1:
+        parser.error("--courses must be at least 1")
+    if args.courses > 1 and args.record is not None:
+        parser.error("generations played on several courses can not be recorded")
+    distributed = args.workers > 1 or args.cluster is not None
+    settings = loadSettings()
+    HEADLESS = args.headless or (distributed and args.render_generations == 1 and not args.render_best)
+    seed = args.seed
+    render_every = args.render_every
+    render_generations = args.render_generations
+    render_best = args.render_best
+    fast_startup = args.fast_startup
+    frame_cap = not fast_startup  # nothing is shown, rendered generations run as fast as they are drawn
+    courses = args.courses
+    combine = args.combine
+    checkpoint_every = args.checkpoint_every
+    checkpoint_minutes = args.checkpoint_minutes
+    metrics_path = args.metrics
+    record_directory = args.record
+    profiler = createProfiler(args)
+    profile_overlay = args.profile_overlay
+    resume = checkpoint.latestCheckpoint() if args.resume == "latest" else args.resume
+    if args.resume is not None and resume is None:
+        parser.error("there is no checkpoint in checkpoints/ to resume from")
+    if resume is None and args.metrics is not None and os.path.exists(args.metrics) and os.path.getsize(args.metrics):
+        parser.error(f"{args.metrics} already holds the metrics of another run, pass --resume to continue it "
+                     f"or another --metrics file")
+    if args.cluster is not None:
+        try:
+            evaluator = cluster.ClusterEvaluator(args.cluster, args.authkey, settings, local_workers=args.local_workers)
+        except ValueError as error:
+            parser.error(str(error))
+    elif args.workers > 1:
+        evaluator = parallel.ParallelEvaluator(args.workers, settings)
+
+    # save the finished generations before the process is terminated
+    signal.signal(signal.SIGTERM, stopTraining)
+
     local_dir = os.path.dirname(__file__)
     path_to_config_file = os.path.join(local_dir, "neat-config.cfg")
     runNeatAlgorithm(path_to_config_file)